@@ -24,10 +24,10 @@ else:
 def get_supabase() -> Client:
     """
     Get the Supabase client instance.
-    
+
     Returns:
         Supabase client
-        
+
     Raises:
         Exception: If Supabase client is not initialized
     """
@@ -35,3 +35,18 @@ def get_supabase() -> Client:
         raise Exception("Supabase client not initialized. Check environment variables.")
     return supabase
 
+
+def order_embedded(query, resource: str, column: str, desc: bool = False):
+    """
+    Order the rows of an embedded resource, e.g. `scripts` in
+    `projects?select=id,scripts(*)`.
+
+    postgrest-py's `order(..., foreign_table=...)` emits `order=scripts(col)`,
+    which sorts the parent rows (and is rejected for one-to-many embeds);
+    PostgREST expects `scripts.order=col.desc` instead. `filter()` adds exactly
+    that `key=value.direction` pair through the builder.
+
+    Returns:
+        The same query builder, for chaining
+    """
+    return query.filter(f"{resource}.order", column, "desc" if desc else "asc")
@@ -1,5 +1,6 @@
 import base64
 import io
+import logging
 import os
 import sys
 import time
@@ -33,6 +34,13 @@ CORS_ORIGINS = [
 _sd_pipeline = None
 _sd_model_id = None
 
+# Single root handler for module loggers (e.g. routes.video); LOG_LEVEL=DEBUG
+# turns on per-image/per-segment diagnostics
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+)
+
 app = FastAPI(title="TubeAI API", version="0.1.0")
 
 # CORS middleware
@@ -66,6 +74,13 @@ app.include_router(video_router, prefix="/api/video")
 app.include_router(projects_router)
 
 
+@app.on_event("shutdown")
+async def close_llm_client():
+    """Release the pooled connections held by the shared LLM HTTP client."""
+    from services.script_generation import close_http_client
+    await close_http_client()
+
+
 class ImageRequest(BaseModel):
     """Request model for image generation."""
     prompt: str = Field(..., min_length=1, description="Text prompt for image generation")
@@ -11,7 +11,7 @@ import asyncio
 
 from auth.verify import verify_token
 from db.client import get_supabase
-from services.photo_analysis import analyse_image_bytes
+from services.photo_analysis import analyse_image_bytes_async
 
 router = APIRouter()
 
@@ -908,7 +908,7 @@ async def upload_image(req: ImageUploadRequest, user_id: str = Depends(verify_to
         analysis = None
         if img_bytes:
             try:
-                analysis = analyse_image_bytes(img_bytes)
+                analysis = await analyse_image_bytes_async(img_bytes)
             except Exception as e:
                 # Photo analysis is best-effort; failures should not block upload
                 print(f"[PHOTO_ANALYSIS] Failed to analyse uploaded image: {e}")
@@ -1031,7 +1031,7 @@ async def upload_project_photo(
         analysis = None
         if img_bytes:
             try:
-                analysis = analyse_image_bytes(img_bytes)
+                analysis = await analyse_image_bytes_async(img_bytes)
             except Exception as e:
                 print(f"[PHOTO_ANALYSIS] Failed to analyse project photo: {e}")
 
@@ -2,9 +2,12 @@
 Script generation endpoints with Supabase integration
 """
 
+import asyncio
+import json
 import os
 from typing import Optional, Literal
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from auth.verify import verify_token_async
 from db.client import get_supabase
@@ -37,6 +40,7 @@ class ScriptGenerationRequest(BaseModel):
     property_features: Optional[list[str]] = Field(None)
     model_provider: Optional[Literal['auto', 'groq', 'gemini', 'openai', 'anthropic']] = Field('auto')
     model_name: Optional[str] = Field(None, description="Provider-specific model name override")
+    use_cache: bool = Field(True, description="Reuse a cached result for an identical request")
 
 
 class ScriptGenerationResponse(BaseModel):
@@ -64,6 +68,129 @@ async def generate_script(
     5. Return script content and ID
     """
     supabase = get_supabase()
+    photos = _load_grounding_photos(supabase, request, user_id)
+
+    # 3. Generate script using selected provider/model (delegated to service)
+    try:
+        from services.script_generation import generate_script_with_gemini
+        
+        script_content = await generate_script_with_gemini(**_generation_kwargs(request, photos))
+        
+    except ImportError:
+        raise HTTPException(
+            status_code=501,
+            detail="Script generation service not available"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Script generation failed: {str(e)}"
+        )
+    
+    script_id = _save_generated_script(supabase, request, photos, script_content)
+
+    # 7. Return response
+    return {
+        "success": True,
+        "script_id": script_id,
+        "content": script_content,
+        "mode": request.mode,
+        "image_count": request.image_count
+    }
+
+
+@router.post("/generate/stream")
+async def generate_script_stream(
+    request: ScriptGenerationRequest,
+    user_id: str = Depends(verify_token_async)
+):
+    """
+    Same as /generate, but streams the script as Server-Sent Events.
+    
+    Emits `delta` events ({"text": ...}) while the model writes, then one
+    `done` event with the saved script (the /generate response body) or an
+    `error` event ({"detail": ...}) if generation or saving fails.
+    """
+    supabase = get_supabase()
+    photos = _load_grounding_photos(supabase, request, user_id)
+    
+    try:
+        from services.script_generation import stream_script
+    except ImportError:
+        raise HTTPException(
+            status_code=501,
+            detail="Script generation service not available"
+        )
+    
+    async def events():
+        script_content = ""
+        try:
+            async for kind, text in stream_script(**_generation_kwargs(request, photos)):
+                if kind == "delta":
+                    yield _sse_event("delta", {"text": text})
+                else:
+                    script_content = text
+            script_id = await asyncio.to_thread(
+                _save_generated_script, supabase, request, photos, script_content
+            )
+        except HTTPException as e:
+            yield _sse_event("error", {"detail": e.detail})
+            return
+        except Exception as e:
+            yield _sse_event("error", {"detail": f"Script generation failed: {str(e)}"})
+            return
+        
+        yield _sse_event("done", {
+            "success": True,
+            "script_id": script_id,
+            "content": script_content,
+            "mode": request.mode,
+            "image_count": request.image_count
+        })
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _generation_kwargs(request: ScriptGenerationRequest, photos: list[dict]) -> dict:
+    """Service arguments for a generation request."""
+    return dict(
+        topic=request.topic,
+        style_name=request.style_name,
+        mode=request.mode,
+        temperature=request.temperature,
+        word_count=request.word_count,
+        image_count=request.image_count,
+        selection=request.selection,
+        context_mode=request.context_mode,
+        transcript=request.transcript,
+        web_data=request.web_data,
+        # Real estate fields
+        video_type=request.video_type,
+        property_address=request.property_address,
+        property_type=request.property_type,
+        property_price=request.property_price,
+        bedrooms=request.bedrooms,
+        bathrooms=request.bathrooms,
+        square_feet=request.square_feet,
+        mls_number=request.mls_number,
+        property_features=request.property_features,
+        model_provider=request.model_provider,
+        model_name=request.model_name,
+        photos=photos or None,
+        use_cache=request.use_cache,
+    )
+
+
+def _load_grounding_photos(supabase, request: ScriptGenerationRequest, user_id: str) -> list[dict]:
+    """Check project ownership and collect its analysed photos for grounding."""
     
     # 1. Verify user owns this project
     try:
@@ -131,47 +258,11 @@ async def generate_script(
     # For now, first script uses project-level photos in upload order (one scene per photo).
     # If no photos exist, photos list will be empty and the script falls back to non-photo template.
 
-    # 3. Generate script using selected provider/model (delegated to service)
-    try:
-        from services.script_generation import generate_script_with_gemini
-        
-        script_content = await generate_script_with_gemini(
-            topic=request.topic,
-            style_name=request.style_name,
-            mode=request.mode,
-            temperature=request.temperature,
-            word_count=request.word_count,
-            image_count=request.image_count,
-            selection=request.selection,
-            context_mode=request.context_mode,
-            transcript=request.transcript,
-            web_data=request.web_data,
-            # Real estate fields
-            video_type=request.video_type,
-            property_address=request.property_address,
-            property_type=request.property_type,
-            property_price=request.property_price,
-            bedrooms=request.bedrooms,
-            bathrooms=request.bathrooms,
-            square_feet=request.square_feet,
-            mls_number=request.mls_number,
-            property_features=request.property_features,
-            model_provider=request.model_provider,
-            model_name=request.model_name,
-            photos=photos or None,
-        )
-        
-    except ImportError:
-        raise HTTPException(
-            status_code=501,
-            detail="Script generation service not available"
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Script generation failed: {str(e)}"
-        )
-    
+    return photos
+
+
+def _save_generated_script(supabase, request: ScriptGenerationRequest, photos: list[dict], script_content: str) -> str:
+    """Store the script, create its photo scenes and update the project; returns the script id."""
     # 3. Build a scene->photo mapping for later use (one scene per photo in order)
     scene_photo_map = None
     if photos:
@@ -243,15 +334,8 @@ async def generate_script(
     except Exception as e:
         # Non-critical error, log but don't fail
         print(f"Warning: Failed to update project: {str(e)}")
-    
-    # 7. Return response
-    return {
-        "success": True,
-        "script_id": script_id,
-        "content": script_content,
-        "mode": request.mode,
-        "image_count": request.image_count
-    }
+
+    return script_id
 
 
 class ScriptUpdateRequest(BaseModel):
@@ -1,58 +1,324 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Optional, List
+import asyncio
+import logging
 import base64
+import io
 import uuid
 import os
 import subprocess
 import tempfile
 import re
-from pathlib import Path
+import struct
+import time
+import wave
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from PIL import Image
 
 from auth.verify import verify_token
-from db.client import get_supabase
+from db.client import get_supabase, order_embedded
+from routes.voiceover import VOICEOVER_BUCKET
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# "Scene X" marker with optional "(m:ss-m:ss)" timestamps
+_SCENE_RE = re.compile(r'^Scene\s+(\d+)(?:\s*\(([\d:]+)\s*-\s*([\d:]+)\))?', re.IGNORECASE)
+_VOWEL_GROUP_RE = re.compile(r'[aeiouy]+')
+
+# FFmpeg writes large stderr logs and reads whole images from stdin; a 1 MB
+# pipe avoids many small reads/writes
+_PIPE_BUFSIZE = 1 << 20
+
+# Base64 decode chunk size; must be a multiple of 4
+_B64_CHUNK = 64 * 1024
+
+# MP4 box header: 32-bit big-endian size followed by the 4-byte box type
+_BOX_HEADER = struct.Struct('>I4s')
+
+# Output frame size for every segment
+_FRAME_SIZE = (1280, 720)
+_SCALE_PAD_FILTER = (
+    'scale=1280:720:force_original_aspect_ratio=decrease,'
+    'pad=1280:720:(ow-iw)/2:(oh-ih)/2'
+)
+
+# Segment encodes run concurrently; each FFmpeg process is itself multi-threaded,
+# so only a few at a time
+_SEGMENT_CONCURRENCY = max(1, min(4, (os.cpu_count() or 2) // 2))
+
+# Threads used to decode and fingerprint the image payloads of one job
+_DECODE_WORKERS = min(16, (os.cpu_count() or 2) * 2)
+
+# Compiled videos live on disk (apps/videos), outside the database
+VIDEOS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'videos')
+os.makedirs(VIDEOS_DIR, exist_ok=True)
+
+# Strong references to in-flight compile jobs so they aren't garbage collected
+_compile_tasks: set[asyncio.Task] = set()
+# A video still 'processing' this long after it was queued, with no compile
+# job in this process, was lost (e.g. to a restart) and is reported as failed
+COMPILE_JOB_TIMEOUT = timedelta(minutes=30)
+
+# video_id -> (expiry, owning user_id) so repeated /file requests (range reads
+# from the player) skip the ownership lookup
+_VIDEO_OWNER_TTL = 60.0
+_VIDEO_OWNER_CACHE_SIZE = 2048
+_video_owner_cache: dict[str, tuple[float, str]] = {}
+
+# Software H.264 settings. Stills + fades: skip the motion search 'medium'
+# would waste time on; baseline/3.0 for maximum browser compatibility
+_X264_ARGS = [
+    '-preset', 'veryfast', '-tune', 'stillimage', '-crf', '23',
+    '-profile:v', 'baseline', '-level', '3.0',
+]
+
+# Hardware H.264 encoders in order of preference, with quality settings
+# roughly matching libx264 at CRF 23
+_HW_ENCODERS = {
+    'h264_nvenc': [
+        '-preset', 'p1', '-rc', 'vbr', '-cq', '23', '-b:v', '0',
+        '-profile:v', 'baseline', '-level', '3.0',
+    ],
+    'h264_vaapi': ['-qp', '23', '-profile:v', 'constrained_baseline'],
+    'h264_videotoolbox': ['-b:v', '4M', '-profile:v', 'baseline'],
+}
+_VAAPI_DEVICE = '/dev/dri/renderD128'
+_video_encoder: Optional[str] = None
+
+# FFmpeg availability rarely changes within a process; re-probe at most this often
+_FFMPEG_CHECK_TTL = 300.0
+_ffmpeg_check: Optional[tuple[float, bool]] = None
+
 
 class VideoCompileRequest(BaseModel):
     project_id: str
 
 
-def _check_ffmpeg() -> bool:
-    """Check if FFmpeg is available."""
+def _content_hash(data: bytes) -> str:
+    """Short content fingerprint for duplicate-image checks and logs.
+
+    CRC32 (zlib, C speed) is plenty for spotting identical images; it is not
+    meant to be collision resistant.
+    """
+    return format(zlib.crc32(data), '08x')
+
+
+def _data_url_header(data: str) -> tuple[str, int]:
+    """Return (header, payload offset) for a data URL or bare base64 string.
+
+    Only the first few hundred characters are scanned for the header comma,
+    so multi-megabyte payloads are never split.
+    """
+    comma = data.find(',', 0, 256) if data.startswith('data:') else -1
+    if comma == -1:
+        return '', 0
+    return data[:comma], comma + 1
+
+
+def _split_data_url(data: str) -> tuple[str, bytes]:
+    """Decode a data URL (or bare base64 string) into (header, raw bytes)."""
+    header, start = _data_url_header(data)
+    return header, base64.b64decode(data[start:])
+
+
+def _decode_to_file(data: str, start: int, path: str) -> int:
+    """Stream-decode base64 `data[start:]` into `path`, returning bytes written.
+
+    Decoding in 64 KB (4-aligned) chunks keeps peak memory near the size of
+    the base64 string instead of string plus full decoded copy.
+    """
+    written = 0
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
     try:
-        result = subprocess.run(['ffmpeg', '-version'], 
-                              capture_output=True, 
-                              timeout=5)
-        return result.returncode == 0
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        return False
+        for i in range(start, len(data), _B64_CHUNK):
+            view = memoryview(base64.b64decode(data[i:i + _B64_CHUNK]))
+            written += len(view)
+            while view:
+                view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    return written
+
 
+async def _run(
+    cmd: List[str],
+    timeout: float,
+    input: Optional[bytes] = None,
+) -> subprocess.CompletedProcess:
+    """Run a command without blocking the event loop; output is decoded as text.
 
-def _get_audio_duration(audio_path: str) -> float:
-    """Get audio duration in seconds using FFprobe."""
+    Raises asyncio.TimeoutError (after killing the process) if it overruns.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.PIPE if input is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        limit=_PIPE_BUFSIZE,
+        pipesize=_PIPE_BUFSIZE,
+    )
     try:
-        result = subprocess.run([
+        stdout, stderr = await asyncio.wait_for(proc.communicate(input), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return subprocess.CompletedProcess(
+        cmd,
+        proc.returncode,
+        stdout.decode('utf-8', errors='replace'),
+        stderr.decode('utf-8', errors='replace'),
+    )
+
+
+async def _check_ffmpeg() -> bool:
+    """Check if FFmpeg is available (cached for `_FFMPEG_CHECK_TTL` seconds)."""
+    global _ffmpeg_check
+    now = time.monotonic()
+    if _ffmpeg_check and now - _ffmpeg_check[0] < _FFMPEG_CHECK_TTL:
+        return _ffmpeg_check[1]
+    try:
+        result = await _run(['ffmpeg', '-version'], timeout=5)
+        available = result.returncode == 0
+    except (asyncio.TimeoutError, FileNotFoundError):
+        available = False
+    _ffmpeg_check = (now, available)
+    return available
+
+
+def _owner_user_id(row: dict) -> Optional[str]:
+    """Pull user_id out of a `projects!inner(user_id)` join, whatever its shape."""
+    project = row.get('projects')
+    if isinstance(project, list):
+        project = project[0] if project else None
+    return project.get('user_id') if isinstance(project, dict) else None
+
+
+def _resolve_video_owner(supabase, video_id: str) -> Optional[str]:
+    """Return the user_id owning a video (one joined query, cached briefly)."""
+    now = time.monotonic()
+    cached = _video_owner_cache.get(video_id)
+    if cached and cached[0] > now:
+        return cached[1]
+    
+    result = (
+        supabase.table('videos')
+        .select('project_id, projects!inner(user_id)')
+        .eq('id', video_id)
+        .limit(1)
+        .execute()
+    )
+    owner = _owner_user_id(result.data[0]) if result.data else None
+    if owner:
+        if len(_video_owner_cache) >= _VIDEO_OWNER_CACHE_SIZE:
+            _video_owner_cache.clear()
+        _video_owner_cache[video_id] = (now + _VIDEO_OWNER_TTL, owner)
+    return owner
+
+
+def _hwaccel_args(encoder: str) -> List[str]:
+    """Global args an encoder needs before the inputs (VAAPI device)."""
+    return ['-vaapi_device', _VAAPI_DEVICE] if encoder == 'h264_vaapi' else []
+
+
+def _video_args(encoder: str, filters: Optional[List[str]] = None) -> List[str]:
+    """Filter chain plus codec args for an H.264 encode with `encoder`."""
+    filters = list(filters or [])
+    if encoder == 'h264_vaapi':
+        # Frames have to be uploaded to the GPU in a format it accepts
+        filters += ['format=nv12', 'hwupload']
+        pix_fmt = []
+    else:
+        pix_fmt = ['-pix_fmt', 'yuv420p']
+    args = ['-vf', ','.join(filters)] if filters else []
+    return args + ['-c:v', encoder, *pix_fmt, *_HW_ENCODERS.get(encoder, _X264_ARGS)]
+
+
+async def _detect_hw_encoder() -> str:
+    """Pick a working hardware H.264 encoder, falling back to libx264.
+
+    Listed encoders are only candidates (builds ship nvenc without a GPU), so
+    each one is confirmed with a tiny test encode. Cached for the process.
+    """
+    global _video_encoder
+    if _video_encoder is not None:
+        return _video_encoder
+    encoder = 'libx264'
+    try:
+        listing = await _run(['ffmpeg', '-hide_banner', '-encoders'], timeout=10)
+        for candidate in _HW_ENCODERS:
+            if candidate not in listing.stdout:
+                continue
+            probe = await _run([
+                'ffmpeg', '-hide_banner', '-v', 'error',
+                *_hwaccel_args(candidate),
+                '-f', 'lavfi', '-i', 'color=c=black:s=256x144:d=0.1',
+                *_video_args(candidate),
+                '-f', 'null', '-'
+            ], timeout=15)
+            if probe.returncode == 0:
+                encoder = candidate
+                break
+    except (asyncio.TimeoutError, FileNotFoundError):
+        pass
+    logger.info("[FFMPEG] Using H.264 encoder: %s", encoder)
+    _video_encoder = encoder
+    return encoder
+
+
+def _wav_duration(audio_path: str) -> Optional[float]:
+    """Read a PCM WAV's duration from its header, or None if it isn't one."""
+    try:
+        with wave.open(audio_path, 'rb') as wav:
+            rate = wav.getframerate()
+            return wav.getnframes() / rate if rate else None
+    except (wave.Error, EOFError):
+        return None
+
+
+async def _get_audio_duration(audio_path: str) -> float:
+    """Get audio duration in seconds, falling back to FFprobe for non-WAV input."""
+    if audio_path.endswith('.wav'):
+        duration = _wav_duration(audio_path)
+        if duration:
+            return duration
+    try:
+        result = await _run([
             'ffprobe', '-v', 'error', '-show_entries',
             'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1',
             audio_path
-        ], capture_output=True, text=True, timeout=10)
+        ], timeout=10)
         
         if result.returncode == 0:
             return float(result.stdout.strip())
         return 0.0
     except Exception as e:
-        print(f"Error getting audio duration: {e}")
+        logger.warning("Error getting audio duration: %s", e)
         return 0.0
 
 
+def _count_syllables(word: str) -> int:
+    """Approximate syllables in a word by counting vowel groups (minimum 1)."""
+    return len(_VOWEL_GROUP_RE.findall(word.lower())) or 1
+
+
+def _speech_weight(text: str) -> int:
+    """Estimate how long text takes to speak, in syllables."""
+    return sum(_count_syllables(w) for w in text.split())
+
+
 def _parse_scene_timings(script_text: str, audio_duration: float) -> List[dict]:
     """Parse script to extract scene boundaries and calculate timings.
     
     Attempts to detect scene transitions by:
     1. Looking for explicit timestamps in script (e.g., "Scene 1 (0:00-0:15)")
-    2. Using word count per scene to estimate duration
+    2. Using syllable count per scene to estimate duration
     3. Falling back to even distribution if no timing info available
     """
     scenes = []
@@ -67,7 +333,7 @@ def _parse_scene_timings(script_text: str, audio_duration: float) -> List[dict]:
             continue
             
         # Match "Scene X" pattern with optional timestamps
-        match = re.match(r'^Scene\s+(\d+)(?:\s*\(([\d:]+)\s*-\s*([\d:]+)\))?', line_stripped, re.IGNORECASE)
+        match = _SCENE_RE.match(line_stripped)
         if match:
             scene_num = int(match.group(1))
             start_time_str = match.group(2) if match.group(2) else None
@@ -122,13 +388,14 @@ def _parse_scene_timings(script_text: str, audio_duration: float) -> List[dict]:
     has_timestamps = any(s.get('start_time') is not None for s in scene_content.values())
     
     if has_timestamps:
-        for scene_num, scene_data in sorted_scenes:
+        # Each scene without an end time runs until the next scene starts
+        next_starts = [s.get('start_time') for _, s in sorted_scenes[1:]] + [audio_duration]
+        for i, (scene_num, scene_data) in enumerate(sorted_scenes):
             start = scene_data.get('start_time', 0)
             end = scene_data.get('end_time')
             if end is None:
                 # Use next scene's start or audio duration
-                next_scene = next((s for n, s in sorted_scenes if n > scene_num), None)
-                end = next_scene.get('start_time') if next_scene else audio_duration
+                end = next_starts[i] if next_starts[i] is not None else audio_duration
             
             scenes.append({
                 'scene_number': scene_num,
@@ -137,15 +404,16 @@ def _parse_scene_timings(script_text: str, audio_duration: float) -> List[dict]:
                 'duration': end - start
             })
     else:
-        # Use word count to estimate duration (more words = longer duration)
-        total_words = sum(len(s.get('content', '').split()) for s in scene_content.values())
+        # Use syllable count to estimate duration; it tracks TTS speaking time
+        # more closely than raw word count when word lengths vary
+        total_weight = sum(_speech_weight(s.get('content', '')) for s in scene_content.values())
         
-        if total_words > 0:
-            # Distribute audio duration based on word count
+        if total_weight > 0:
+            # Distribute audio duration based on syllable count
             cumulative_time = 0
             for i, (scene_num, scene_data) in enumerate(sorted_scenes):
-                word_count = len(scene_data.get('content', '').split())
-                scene_duration = (word_count / total_words) * audio_duration
+                weight = _speech_weight(scene_data.get('content', ''))
+                scene_duration = (weight / total_weight) * audio_duration
                 
                 start_time = cumulative_time
                 end_time = cumulative_time + scene_duration
@@ -175,241 +443,253 @@ def _parse_scene_timings(script_text: str, audio_duration: float) -> List[dict]:
     return scenes
 
 
-def _compile_video_with_scene_timings(
+def _decode_image(img: dict) -> Optional[tuple[bytes, str]]:
+    """Decode one image payload to (bytes, content hash); None if it is empty."""
+    image_data = img.get('image_data', '') or img.get('image_data_url', '')
+    if not image_data:
+        return None
+    _, img_bytes = _split_data_url(image_data)
+    return img_bytes, _content_hash(img_bytes)
+
+
+def _decode_images(images: List[dict]) -> List[Optional[tuple[bytes, str]]]:
+    """Decode every image payload to (bytes, content hash); None where empty.
+
+    Payloads are decoded on a small thread pool (crc32 releases the GIL on
+    large buffers); results keep the input order.
+    """
+    if len(images) < 2:
+        return [_decode_image(img) for img in images]
+    with ThreadPoolExecutor(max_workers=min(_DECODE_WORKERS, len(images))) as pool:
+        return list(pool.map(_decode_image, images))
+
+
+async def _encode_segment(
+    i: int,
+    total: int,
+    img_info: dict,
+    segment_path: str,
+    encoder: str,
+    fade_duration: float
+) -> bool:
+    """Encode one still image into a faded video segment at `segment_path`."""
+    duration = img_info['duration']
+    fade_out = max(0, duration - fade_duration)
+    
+    logger.debug("[FFMPEG]   Creating segment %s/%s: %.2fs duration, fade out at %.2fs", i+1, total, duration, fade_out)
+    
+    # Pillow only parses the header here; images that are already the
+    # output size skip the scale/pad pass entirely
+    try:
+        with Image.open(io.BytesIO(img_info['image_bytes'])) as im:
+            needs_scale = im.size != _FRAME_SIZE
+    except Exception:
+        needs_scale = True
+    filters = [_SCALE_PAD_FILTER] if needs_scale else []
+    filters += [
+        'loop=loop=-1:size=1:start=0',
+        f'fade=t=in:st=0:d={fade_duration}',
+        f'fade=t=out:st={fade_out}:d={fade_duration}',
+    ]
+    
+    # Create video segment with fade (browser-compatible settings).
+    # The single piped frame is scaled once, then repeated by the loop filter.
+    cmd_segment = [
+        'ffmpeg', '-y',
+        *_hwaccel_args(encoder),
+        '-f', 'image2pipe',
+        '-framerate', '30',
+        '-i', 'pipe:0',
+        '-t', str(duration),
+        '-r', '30',  # 30 fps
+        *_video_args(encoder, filters),
+        '-g', '60',
+        '-keyint_min', '60',
+        segment_path
+    ]
+    
+    logger.debug("[FFMPEG]   Piping image for Scene %s (%s bytes)", img_info.get('scene_number', '?'), len(img_info['image_bytes']))
+    
+    result = await _run(cmd_segment, timeout=60, input=img_info['image_bytes'])
+    if result.returncode != 0:
+        logger.error("[FFMPEG] ❌ Segment %s creation error:", i+1)
+        logger.error("[FFMPEG] stderr: %s", result.stderr[:500])
+        return False
+    
+    # Verify segment was created
+    if not os.path.exists(segment_path):
+        logger.error("[FFMPEG] ❌ Segment file was not created: %s", segment_path)
+        return False
+    
+    segment_size = os.path.getsize(segment_path)
+    logger.debug("[FFMPEG]   ✓ Segment %s created: %s (%s bytes)", i+1, segment_path, segment_size)
+    return True
+
+
+async def _compile_video_with_scene_timings(
     audio_path: str,
-    images: List[dict],  # List of {scene_number, image_path, start_time, duration}
+    images: List[dict],  # List of {scene_number, image_bytes, start_time, duration}
     output_path: str,
     audio_duration: float
 ) -> bool:
-    """Compile video using FFmpeg with fade transitions and scene-specific timings."""
-    print(f"[VIDEO] [FFMPEG] Starting video compilation...")
-    print(f"[VIDEO] [FFMPEG] Audio: {audio_path}, Images: {len(images)}, Output: {output_path}")
+    """Compile video using FFmpeg with fade transitions and scene-specific timings.
+
+    Image bytes are piped to each segment encode over stdin, so decoded images
+    never have to be written to disk.
+    """
+    logger.info("[FFMPEG] Starting video compilation...")
+    logger.info("[FFMPEG] Audio: %s, Images: %s, Output: %s", audio_path, len(images), output_path)
     try:
-        # Create temporary directory for image sequence
-        temp_dir = tempfile.mkdtemp()
-        
-        # Sort images by scene number
-        sorted_images = sorted(images, key=lambda x: x.get('scene_number', 0))
-        
-        if not sorted_images:
-            raise ValueError("No images provided")
-        
-        fade_duration = 0.5  # 0.5 second fade transitions
-        
-        # Prepare image paths and create copies with proper naming
-        print(f"[VIDEO] [FFMPEG] Preparing {len(sorted_images)} image segments...")
-        print(f"[VIDEO] [FFMPEG] Input images list:")
-        for idx, img_data in enumerate(sorted_images):
-            print(f"[VIDEO] [FFMPEG]   [{idx}] Scene {img_data.get('scene_number', '?')}: {img_data.get('image_path', '?')} (duration: {img_data.get('duration', 0):.2f}s)")
-        
-        image_files = []
-        for i, img_data in enumerate(sorted_images):
-            img_path = img_data['image_path']
-            scene_num = img_data.get('scene_number', i + 1)
-            
-            # Verify source image exists
-            if not os.path.exists(img_path):
-                print(f"[VIDEO] [FFMPEG] ❌ ERROR: Source image not found: {img_path}")
+        # Intermediate segments live in a temp directory that is removed on
+        # every exit path, including early returns and exceptions
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Sort images by scene number
+            sorted_images = sorted(images, key=lambda x: x.get('scene_number', 0))
+            
+            if not sorted_images:
+                raise ValueError("No images provided")
+            
+            fade_duration = 0.5  # 0.5 second fade transitions
+            encoder = await _detect_hw_encoder()
+            
+            # Prepare image segments
+            logger.info("[FFMPEG] Preparing %s image segments...", len(sorted_images))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[FFMPEG] Input images list:")
+                for idx, img_data in enumerate(sorted_images):
+                    logger.debug("[FFMPEG]   [%s] Scene %s: %s bytes (duration: %.2fs)", idx, img_data.get('scene_number', '?'), len(img_data.get('image_bytes') or b''), img_data.get('duration', 0))
+            
+            image_files = []
+            for i, img_data in enumerate(sorted_images):
+                img_bytes = img_data.get('image_bytes')
+                scene_num = img_data.get('scene_number', i + 1)
+                
+                # Verify source image is present
+                if not img_bytes:
+                    logger.error("[FFMPEG] ❌ ERROR: No image data for Scene %s", scene_num)
+                    return False
+                
+                # The hash was computed when the caller decoded the image
+                file_hash = img_data.get('hash', '')
+
+                # Verify this is a different image than previous one
+                if i > 0 and image_files and file_hash:
+                    prev_hash = image_files[-1].get('hash', '')
+                    if prev_hash == file_hash:
+                        logger.warning("[FFMPEG] ⚠️  WARNING: Segment %s (Scene %s) has same hash as previous segment (Scene %s) - may be duplicate image!", i+1, scene_num, image_files[-1].get('scene_number', '?'))
+                
+                image_files.append({
+                    'image_bytes': img_bytes,
+                    'scene_number': scene_num,
+                    'duration': img_data.get('duration', audio_duration / len(sorted_images)),
+                    'start_time': img_data.get('start_time', i * (audio_duration / len(sorted_images))),
+                    'hash': file_hash  # Store hash for comparison
+                })
+                logger.debug("[FFMPEG]   ✓ Prepared segment %s/%s: Scene %s (hash: %s, duration: %.2fs)", i+1, len(sorted_images), scene_num, file_hash[:8], img_data.get('duration', 0))
+            
+            # Create individual video segments with fades
+            logger.info("[FFMPEG] Creating video segments with fade transitions...")
+            video_segments = []
+            encode_jobs = []
+            reused_segments = []
+            # (image hash, duration) -> (image bytes, encoded segment path), so a
+            # repeated image (title cards, reused templates) is only encoded once
+            encoded_cache: dict[tuple[str, float], tuple[bytes, str]] = {}
+            for i, img_info in enumerate(image_files):
+                segment_path = os.path.join(temp_dir, f'segment_{i:04d}.mp4')
+                video_segments.append(segment_path)
+                
+                cache_key = (img_info['hash'], img_info['duration'])
+                cached = encoded_cache.get(cache_key)
+                if cached and cached[0] == img_info['image_bytes']:
+                    reused_segments.append((cached[1], segment_path))
+                    continue
+                if img_info['hash']:
+                    encoded_cache[cache_key] = (img_info['image_bytes'], segment_path)
+                encode_jobs.append((i, img_info, segment_path))
+            
+            # Segments are independent, so encode them side by side (bounded so
+            # concurrent FFmpeg processes don't oversubscribe the CPU)
+            semaphore = asyncio.Semaphore(_SEGMENT_CONCURRENCY)
+            
+            async def encode(i: int, img_info: dict, segment_path: str) -> bool:
+                async with semaphore:
+                    return await _encode_segment(
+                        i, len(image_files), img_info, segment_path, encoder, fade_duration
+                    )
+            
+            results = await asyncio.gather(*(encode(*job) for job in encode_jobs))
+            if not all(results):
                 return False
             
-            # Copy image to temp directory with unique naming (include scene number and index)
-            ext = Path(img_path).suffix or '.png'
-            temp_img_path = os.path.join(temp_dir, f'img_scene_{scene_num:03d}_seq_{i:04d}{ext}')
-            
-            # Copy image file
-            import shutil
-            shutil.copy2(img_path, temp_img_path)
+            for source_path, segment_path in reused_segments:
+                try:
+                    os.link(source_path, segment_path)
+                except OSError:
+                    import shutil
+                    shutil.copyfile(source_path, segment_path)
+                logger.debug("[FFMPEG]   ✓ %s reuses identical segment %s", segment_path, source_path)
+            
+            # Concatenate all segments
+            logger.info("[FFMPEG] Concatenating video segments...")
+            concat_list_file = os.path.join(temp_dir, 'filelist.txt')
+            with open(concat_list_file, 'w') as f:
+                for segment in video_segments:
+                    f.write(f"file '{segment}'\n")
+            
+            # Concatenate video segments (re-encode for browser compatibility)
+            cmd_concat = [
+                'ffmpeg', '-y',
+                *_hwaccel_args(encoder),
+                '-f', 'concat',
+                '-safe', '0',
+                '-i', concat_list_file,
+                *_video_args(encoder),
+                os.path.join(temp_dir, 'video_no_audio.mp4')
+            ]
             
-            # Verify copy succeeded
-            if not os.path.exists(temp_img_path):
-                print(f"[VIDEO] [FFMPEG] ❌ ERROR: Failed to copy image to: {temp_img_path}")
+            result = await _run(cmd_concat, timeout=120)
+            if result.returncode != 0:
+                logger.error("[FFMPEG] ❌ Concat error: %s", result.stderr)
                 return False
+            logger.info("[FFMPEG] ✓ Segments concatenated and re-encoded")
             
-            # Calculate file hash to verify it's unique
-            import hashlib
-            with open(temp_img_path, 'rb') as f:
-                file_hash = hashlib.md5(f.read()).hexdigest()[:8]
-            
-            # Verify this is a different image than previous one
-            if i > 0 and image_files:
-                prev_hash = image_files[-1].get('hash', '')
-                if prev_hash == file_hash:
-                    print(f"[VIDEO] [FFMPEG] ⚠️  WARNING: Segment {i+1} (Scene {scene_num}) has same hash as previous segment (Scene {image_files[-1].get('scene_number', '?')}) - may be duplicate image!")
-            
-            image_files.append({
-                'path': temp_img_path,
-                'scene_number': scene_num,
-                'duration': img_data.get('duration', audio_duration / len(sorted_images)),
-                'start_time': img_data.get('start_time', i * (audio_duration / len(sorted_images))),
-                'hash': file_hash  # Store hash for comparison
-            })
-            print(f"[VIDEO] [FFMPEG]   ✓ Prepared segment {i+1}/{len(sorted_images)}: Scene {scene_num} -> {temp_img_path} (hash: {file_hash[:8]}, duration: {img_data.get('duration', 0):.2f}s)")
-        
-        # Create individual video segments with fades
-        print(f"[VIDEO] [FFMPEG] Creating video segments with fade transitions...")
-        video_segments = []
-        for i, img_info in enumerate(image_files):
-            segment_path = os.path.join(temp_dir, f'segment_{i:04d}.mp4')
-            video_segments.append(segment_path)
-            
-            duration = img_info['duration']
-            fade_out = max(0, duration - fade_duration)
-            
-            print(f"[VIDEO] [FFMPEG]   Creating segment {i+1}/{len(image_files)}: {duration:.2f}s duration, fade out at {fade_out:.2f}s")
-            
-            # Create video segment with fade (browser-compatible settings)
-            cmd_segment = [
+            # Combine video with audio (re-encode for browser compatibility)
+            logger.info("[FFMPEG] Combining video with audio track...")
+            cmd_final = [
                 'ffmpeg', '-y',
-                '-loop', '1',
-                '-i', img_info['path'],
-                '-vf', f'scale=1280:720:force_original_aspect_ratio=decrease,pad=1280:720:(ow-iw)/2:(oh-ih)/2,fade=t=in:st=0:d={fade_duration},fade=t=out:st={fade_out}:d={fade_duration}',
-                '-t', str(duration),
-                '-r', '30',  # 30 fps
-                '-c:v', 'libx264',
-                '-pix_fmt', 'yuv420p',
-                '-preset', 'medium',
-                '-profile:v', 'baseline',  # Use baseline profile for maximum browser compatibility
-                '-level', '3.0',
-                segment_path
+                *_hwaccel_args(encoder),
+                '-i', os.path.join(temp_dir, 'video_no_audio.mp4'),
+                '-i', audio_path,
+                *_video_args(encoder),
+                '-g', '60',
+                '-keyint_min', '60',
+                '-c:a', 'aac',
+                '-b:a', '192k',
+                '-ar', '44100',  # Standard audio sample rate
+                '-strict', '-2',  # Allow experimental codecs (if needed)
+                '-movflags', '+faststart',  # CRITICAL: Move moov box to beginning for web playback
+                '-map', '0:v:0',  # Map first video stream
+                '-map', '1:a:0',  # Map first audio stream
+                '-shortest',
+                '-f', 'mp4',  # Explicitly specify MP4 format
+                output_path
             ]
             
-            # Verify source image exists
-            if not os.path.exists(img_info['path']):
-                print(f"[VIDEO] [FFMPEG] ❌ ERROR: Source image file not found: {img_info['path']}")
-                return False
-            
-            print(f"[VIDEO] [FFMPEG]   Using image: {img_info['path']} (Scene {img_info.get('scene_number', '?')})")
+            result = await _run(cmd_final, timeout=180)
             
-            result = subprocess.run(cmd_segment, capture_output=True, text=True, timeout=60)
             if result.returncode != 0:
-                print(f"[VIDEO] [FFMPEG] ❌ Segment {i+1} creation error:")
-                print(f"[VIDEO] [FFMPEG] stderr: {result.stderr[:500]}")
+                logger.error("[FFMPEG] ❌ Final combination error:")
+                logger.error("[FFMPEG] stderr: %s", result.stderr[:1000])
                 return False
             
-            # Verify segment was created
-            if not os.path.exists(segment_path):
-                print(f"[VIDEO] [FFMPEG] ❌ Segment file was not created: {segment_path}")
+            if not os.path.exists(output_path):
+                logger.error("[FFMPEG] ❌ Output file not found")
                 return False
             
-            segment_size = os.path.getsize(segment_path)
-            print(f"[VIDEO] [FFMPEG]   ✓ Segment {i+1} created: {segment_path} ({segment_size} bytes)")
-        
-        # Concatenate all segments
-        print(f"[VIDEO] [FFMPEG] Concatenating video segments...")
-        concat_list_file = os.path.join(temp_dir, 'filelist.txt')
-        with open(concat_list_file, 'w') as f:
-            for segment in video_segments:
-                f.write(f"file '{segment}'\n")
-        
-        # Concatenate video segments (re-encode for browser compatibility)
-        cmd_concat = [
-            'ffmpeg', '-y',
-            '-f', 'concat',
-            '-safe', '0',
-            '-i', concat_list_file,
-            '-c:v', 'libx264',
-            '-pix_fmt', 'yuv420p',
-            '-preset', 'medium',
-            '-crf', '23',
-            os.path.join(temp_dir, 'video_no_audio.mp4')
-        ]
-        
-        result = subprocess.run(cmd_concat, capture_output=True, text=True, timeout=120)
-        if result.returncode != 0:
-            print(f"[VIDEO] [FFMPEG] ❌ Concat error: {result.stderr}")
-            return False
-        print(f"[VIDEO] [FFMPEG] ✓ Segments concatenated and re-encoded")
-        
-        # Combine video with audio (re-encode for browser compatibility)
-        print(f"[VIDEO] [FFMPEG] Combining video with audio track...")
-        cmd_final = [
-            'ffmpeg', '-y',
-            '-i', os.path.join(temp_dir, 'video_no_audio.mp4'),
-            '-i', audio_path,
-            '-c:v', 'libx264',
-            '-pix_fmt', 'yuv420p',
-            '-preset', 'medium',
-            '-crf', '23',
-            '-profile:v', 'baseline',  # Use baseline profile for maximum browser compatibility
-            '-level', '3.0',
-            '-c:a', 'aac',
-            '-b:a', '192k',
-            '-ar', '44100',  # Standard audio sample rate
-            '-strict', '-2',  # Allow experimental codecs (if needed)
-            '-movflags', '+faststart',  # CRITICAL: Move moov box to beginning for web playback
-            '-map', '0:v:0',  # Map first video stream
-            '-map', '1:a:0',  # Map first audio stream
-            '-shortest',
-            '-f', 'mp4',  # Explicitly specify MP4 format
-            output_path
-        ]
-        
-        result = subprocess.run(cmd_final, capture_output=True, text=True, timeout=180)
-        
-        if result.returncode != 0:
-            print(f"[VIDEO] [FFMPEG] ❌ Final combination error:")
-            print(f"[VIDEO] [FFMPEG] stderr: {result.stderr[:1000]}")
-            # Cleanup on error
-            import shutil
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            return False
-        
-        if not os.path.exists(output_path):
-            print(f"[VIDEO] [FFMPEG] ❌ Output file not found")
-            # Cleanup on error
-            import shutil
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            return False
-        
-        # Post-process: ensure faststart is actually applied using qt-faststart (more reliable)
-        print(f"[VIDEO] [FFMPEG] Post-processing: Applying faststart for seeking support...")
-        temp_output = output_path + '.tmp'
-        
-        # Try using qt-faststart first (faster and more reliable)
-        qt_faststart_result = subprocess.run(
-            ['qt-faststart', output_path, temp_output],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        
-        if qt_faststart_result.returncode == 0 and os.path.exists(temp_output):
-            # Replace original with faststart version
-            import shutil
-            shutil.move(temp_output, output_path)
-            print(f"[VIDEO] [FFMPEG] ✅ Faststart applied successfully using qt-faststart")
-        else:
-            # Fallback to FFmpeg faststart
-            print(f"[VIDEO] [FFMPEG] qt-faststart not available, trying FFmpeg faststart...")
-            cmd_faststart = [
-                'ffmpeg', '-y',
-                '-i', output_path,
-                '-c', 'copy',  # Copy streams without re-encoding
-                '-movflags', '+faststart',  # Ensure moov box is at start
-                '-f', 'mp4',
-                temp_output
-            ]
-            
-            faststart_result = subprocess.run(cmd_faststart, capture_output=True, text=True, timeout=60)
-            if faststart_result.returncode == 0 and os.path.exists(temp_output):
-                # Replace original with faststart version
-                import shutil
-                shutil.move(temp_output, output_path)
-                print(f"[VIDEO] [FFMPEG] ✅ Faststart applied successfully using FFmpeg")
-            else:
-                print(f"[VIDEO] [FFMPEG] ⚠️  Faststart post-processing failed")
-                if faststart_result.returncode != 0:
-                    print(f"[VIDEO] [FFMPEG] FFmpeg faststart error: {faststart_result.stderr[:200]}")
-                if os.path.exists(temp_output):
-                    os.remove(temp_output)
-        
-        # Cleanup temp directory
-        import shutil
-        shutil.rmtree(temp_dir, ignore_errors=True)
-        
         # Validate video file with ffprobe - CRITICAL CHECK
         file_size = os.path.getsize(output_path) / (1024 * 1024)
-        print(f"[VIDEO] [FFMPEG] Video file created: {output_path} ({file_size:.2f} MB)")
+        logger.info("[FFMPEG] Video file created: %s (%.2f MB)", output_path, file_size)
         
         # Verify video file is valid and can be read by ffprobe
         cmd_probe = [
@@ -421,210 +701,103 @@ def _compile_video_with_scene_timings(
             output_path
         ]
         
-        probe_result = subprocess.run(cmd_probe, capture_output=True, text=True, timeout=30)
+        probe_result = await _run(cmd_probe, timeout=30)
         if probe_result.returncode != 0:
-            print(f"[VIDEO] [FFMPEG] ❌ Video validation FAILED!")
-            print(f"[VIDEO] [FFMPEG] ffprobe error: {probe_result.stderr}")
-            print(f"[VIDEO] [FFMPEG] This video may not be playable in browsers")
+            logger.error("[FFMPEG] ❌ Video validation FAILED!")
+            logger.warning("[FFMPEG] ffprobe error: %s", probe_result.stderr)
+            logger.warning("[FFMPEG] This video may not be playable in browsers")
             # Don't fail completely, but this is a warning
         else:
-            print(f"[VIDEO] [FFMPEG] ✅ Video validated by ffprobe - should be playable")
+            logger.info("[FFMPEG] ✅ Video validated by ffprobe - should be playable")
             try:
                 import json
                 probe_data = json.loads(probe_result.stdout)
                 if probe_data.get('streams'):
                     stream = probe_data['streams'][0]
-                    print(f"[VIDEO] [FFMPEG] Codec: {stream.get('codec_name')}, Profile: {stream.get('profile')}, Resolution: {stream.get('width')}x{stream.get('height')}")
+                    logger.info("[FFMPEG] Codec: %s, Profile: %s, Resolution: %sx%s", stream.get('codec_name'), stream.get('profile'), stream.get('width'), stream.get('height'))
             except:
                 pass
         
-        print(f"[VIDEO] [FFMPEG] ✅ Video compilation complete! Output: {output_path} ({file_size:.2f} MB)")
+        logger.info("[FFMPEG] ✅ Video compilation complete! Output: %s (%.2f MB)", output_path, file_size)
         return True
         
     except Exception as e:
-        print(f"[VIDEO] [FFMPEG] ❌ Video compilation error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[FFMPEG] ❌ Video compilation error: %s", e)
         return False
 
 
-@router.post("/compile")
-async def compile_video(
-    req: VideoCompileRequest,
-    user_id: str = Depends(verify_token)
-):
-    """Compile video from script, voiceover, and images."""
-    print(f"[VIDEO] Starting compilation for project {req.project_id}")
+async def _run_compile_job(
+    video_id: str,
+    project_id: str,
+    script_text: str,
+    audio_data_url: str,
+    audio_storage_path: Optional[str],
+    images: List[dict],
+    scene_map: dict,
+) -> None:
+    """Decode media, run FFmpeg and record the outcome on the `videos` row.
+
+    Started as a background task by `compile_video`. Failures are stored in the
+    row's `status`/`error_message` instead of being raised.
+    """
+    supabase = get_supabase()
     try:
-        supabase = get_supabase()
-        
-        # Verify project ownership
-        print(f"[VIDEO] Verifying project ownership...")
-        project_result = supabase.table('projects').select('id').eq('id', req.project_id).eq('user_id', user_id).execute()
-        if not project_result.data:
-            raise HTTPException(status_code=403, detail="Project not found or access denied")
-        print(f"[VIDEO] ✓ Project ownership verified")
-        
-        # Check FFmpeg availability
-        print(f"[VIDEO] Checking FFmpeg availability...")
-        if not _check_ffmpeg():
-            raise HTTPException(status_code=503, detail="FFmpeg is not available. Please install FFmpeg.")
-        print(f"[VIDEO] ✓ FFmpeg is available")
-        
-        # Fetch script
-        print(f"[VIDEO] Fetching script...")
-        script_result = (
-            supabase.table('scripts')
-            .select('id, raw_script, edited_script')
-            .eq('project_id', req.project_id)
-            .order('created_at', desc=True)
-            .limit(1)
-            .execute()
-        )
-        
-        if not script_result.data:
-            raise HTTPException(status_code=400, detail="No script found for this project")
-        
-        script = script_result.data[0]
-        script_id = script['id']
-        script_text = script.get('edited_script') or script.get('raw_script', '')
-        print(f"[VIDEO] ✓ Script found (ID: {script_id}, length: {len(script_text)} chars)")
-        
-        # Fetch voiceover
-        print(f"[VIDEO] Fetching voiceover...")
-        voiceover_result = (
-            supabase.table('voiceovers')
-            .select('id, audio_data_url')
-            .eq('script_id', script_id)
-            .order('created_at', desc=True)
-            .limit(1)
-            .execute()
-        )
-        
-        if not voiceover_result.data:
-            raise HTTPException(status_code=400, detail="No voiceover found for this project")
-        
-        voiceover = voiceover_result.data[0]
-        voiceover_id = voiceover['id']
-        audio_data_url = voiceover.get('audio_data_url', '')
-        
-        if not audio_data_url:
-            raise HTTPException(status_code=400, detail="Voiceover audio data not found")
-        print(f"[VIDEO] ✓ Voiceover found (ID: {voiceover_id}, audio length: {len(audio_data_url)} chars)")
-        
-        # Fetch images
-        print(f"[VIDEO] Fetching scenes and images...")
-        scenes_result = (
-            supabase.table('scenes')
-            .select('id, scene_number')
-            .eq('script_id', script_id)
-            .order('scene_number', desc=False)
-            .execute()
-        )
-        
-        if not scenes_result.data:
-            raise HTTPException(status_code=400, detail="No scenes found for this project")
-        
-        scene_ids = [s['id'] for s in scenes_result.data]
-        scene_map = {s['id']: s['scene_number'] for s in scenes_result.data}
-        print(f"[VIDEO] ✓ Found {len(scene_ids)} scenes")
-        
-        # Fetch images - join with scenes to get scene_number
-        images_result = (
-            supabase.table('images')
-            .select('id, scene_id, image_data, scenes!inner(scene_number)')
-            .in_('scene_id', scene_ids)
-            .order('scenes(scene_number)', desc=False)
-            .execute()
-        )
-        
-        print(f"[VIDEO] ✓ Found {len(images_result.data)} images")
-        
-        # Debug: Print all images and their scene numbers
-        print(f"[VIDEO] Images with scene mapping:")
-        print(f"[VIDEO] Raw images_result.data structure (first image):")
-        if images_result.data and len(images_result.data) > 0:
-            import json
-            print(f"[VIDEO]   First image keys: {list(images_result.data[0].keys())}")
-            print(f"[VIDEO]   First image scenes value: {images_result.data[0].get('scenes')}")
-            print(f"[VIDEO]   First image scenes type: {type(images_result.data[0].get('scenes'))}")
-        
-        for idx, img in enumerate(images_result.data):
-            # Try multiple ways to extract scene_number from join
-            scene_num = None
-            scenes_data = img.get('scenes')
-            
-            # Handle different Supabase join result formats
-            if isinstance(scenes_data, dict):
-                scene_num = scenes_data.get('scene_number')
-            elif isinstance(scenes_data, list) and len(scenes_data) > 0:
-                scene_num = scenes_data[0].get('scene_number')
-            
-            scene_id = img.get('scene_id')
-            mapped_scene = scene_map.get(scene_id, 'NOT FOUND') if scene_id else 'NO_SCENE_ID'
-            
-            # Use mapped_scene if join didn't work
-            if scene_num is None and mapped_scene != 'NOT FOUND':
-                scene_num = mapped_scene
-            
-            # Calculate image data hash for uniqueness check
-            img_data = img.get('image_data', '') or img.get('image_data_url', '')
-            img_hash = 'NO_DATA'
-            if img_data:
-                import hashlib
-                img_bytes_sample = img_data[:1000] if len(img_data) > 1000 else img_data
-                img_hash = hashlib.md5(img_bytes_sample.encode() if isinstance(img_bytes_sample, str) else img_bytes_sample).hexdigest()[:8]
-            
-            print(f"[VIDEO]   [{idx+1}] Image {img.get('id')[:8]}... scene_id={scene_id}, scene_number={scene_num}, hash={img_hash}")
-        
-        if not images_result.data:
-            raise HTTPException(status_code=400, detail="No images found for this project")
-        print(f"[VIDEO] ✓ Found {len(images_result.data)} images")
-        
         # Create temporary files
-        print(f"[VIDEO] Creating temporary directory...")
-        temp_dir = tempfile.mkdtemp()
-        print(f"[VIDEO] ✓ Temp directory: {temp_dir}")
-        
-        try:
+        logger.info("Creating temporary directory...")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            logger.info("✓ Temp directory: %s", temp_dir)
+            
             # Save audio to temp file
-            print(f"[VIDEO] Processing audio data...")
-            audio_data = audio_data_url
-            if audio_data.startswith('data:audio'):
-                # Extract base64 data
-                header, data = audio_data.split(',', 1)
-                audio_bytes = base64.b64decode(data)
-                audio_ext = 'wav' if 'wav' in header else 'mp3'
+            logger.info("Processing audio data...")
+            if audio_storage_path:
+                # Raw bytes from Storage go straight to disk, no base64 involved
+                audio_bytes = await asyncio.to_thread(
+                    supabase.storage.from_(VOICEOVER_BUCKET).download, audio_storage_path
+                )
+                audio_ext = os.path.splitext(audio_storage_path)[1].lstrip('.') or 'wav'
+                audio_path = os.path.join(temp_dir, f'audio.{audio_ext}')
+                with open(audio_path, 'wb') as f:
+                    f.write(audio_bytes)
+                audio_size = len(audio_bytes)
             else:
-                # Assume it's already base64
-                audio_bytes = base64.b64decode(audio_data)
-                audio_ext = 'wav'
-            
-            audio_path = os.path.join(temp_dir, f'audio.{audio_ext}')
-            with open(audio_path, 'wb') as f:
-                f.write(audio_bytes)
-            print(f"[VIDEO] ✓ Audio saved to {audio_path} ({len(audio_bytes)} bytes)")
+                # Legacy rows still carry the audio inline as a data URL
+                header, payload_start = _data_url_header(audio_data_url)
+                # Bare base64 is assumed to be WAV
+                audio_ext = 'mp3' if header and 'wav' not in header else 'wav'
+                
+                audio_path = os.path.join(temp_dir, f'audio.{audio_ext}')
+                audio_size = _decode_to_file(audio_data_url, payload_start, audio_path)
+            logger.info("✓ Audio saved to %s (%s bytes)", audio_path, audio_size)
             
             # Get audio duration
-            print(f"[VIDEO] Getting audio duration...")
-            audio_duration = _get_audio_duration(audio_path)
+            logger.info("Getting audio duration...")
+            audio_duration = await _get_audio_duration(audio_path)
             if audio_duration <= 0:
-                raise HTTPException(status_code=400, detail="Could not determine audio duration")
-            print(f"[VIDEO] ✓ Audio duration: {audio_duration:.2f} seconds")
+                raise Exception("Could not determine audio duration")
+            logger.info("✓ Audio duration: %.2f seconds", audio_duration)
             
             # Parse scene timings
-            print(f"[VIDEO] Parsing scene timings...")
+            logger.info("Parsing scene timings...")
             scene_timings = _parse_scene_timings(script_text, audio_duration)
-            print(f"[VIDEO] ✓ Parsed {len(scene_timings)} scene timings")
+            logger.info("✓ Parsed %s scene timings", len(scene_timings))
             for timing in scene_timings:
-                print(f"[VIDEO]   Scene {timing['scene_number']}: {timing['start_time']:.2f}s - {timing['end_time']:.2f}s")
+                logger.debug("  Scene %s: %.2fs - %.2fs", timing['scene_number'], timing['start_time'], timing['end_time'])
             
             # Prepare images with scene numbers and map to timings
-            print(f"[VIDEO] Processing images...")
+            logger.info("Processing images...")
             images_with_scenes = []
+            # scene_number -> first image for that scene, filled as images are decoded
+            images_by_scene = {}
+            # Built once and shared by the per-image timing lookup and the matching pass
             scene_timing_map = {s['scene_number']: s for s in scene_timings}
-            
-            for i, img in enumerate(images_result.data):
+            # Decode and fingerprint the whole batch off the event loop
+            decoded_images = await asyncio.to_thread(_decode_images, images)
+            if not images:
+                raise ValueError("No images provided")
+            # Even split of the audio for images whose scene has no timing
+            default_duration = audio_duration / len(images)
+            
+            for i, img in enumerate(images):
                 # Get scene_number from scenes join or scene_map
                 scene_number = None
                 scenes_data = img.get('scenes')
@@ -643,119 +816,95 @@ async def compile_video(
                     
                     if scene_number is None:
                         # Last resort: use index + 1 (but log warning)
-                        print(f"[VIDEO] ⚠️  Warning: Image {i+1} has no scene_number, using index {i+1}")
+                        logger.warning("⚠️  Warning: Image %s has no scene_number, using index %s", i+1, i+1)
                         scene_number = i + 1
                 
                 # Ensure scene_number is an integer
                 try:
                     scene_number = int(scene_number) if scene_number is not None else (i + 1)
                 except (ValueError, TypeError):
-                    print(f"[VIDEO] ⚠️  Warning: Invalid scene_number '{scene_number}' for image {i+1}, using index {i+1}")
+                    logger.warning("⚠️  Warning: Invalid scene_number '%s' for image %s, using index %s", scene_number, i+1, i+1)
                     scene_number = i + 1
                 
-                print(f"[VIDEO]   [{i+1}] Mapping image (scene_id: {img.get('scene_id')}) -> Scene {scene_number}")
+                logger.debug("  [%s] Mapping image (scene_id: %s) -> Scene %s", i+1, img.get('scene_id'), scene_number)
                 
-                image_data = img.get('image_data', '') or img.get('image_data_url', '')
-                
-                if not image_data:
-                    print(f"[VIDEO] ⚠️  Warning: Image {i+1} has no image data, skipping")
+                if decoded_images[i] is None:
+                    logger.warning("⚠️  Warning: Image %s has no image data, skipping", i+1)
                     continue
                 
-                if image_data.startswith('data:image'):
-                    header, data = image_data.split(',', 1)
-                    img_bytes = base64.b64decode(data)
-                    img_ext = 'png' if 'png' in header else 'jpg'
-                else:
-                    img_bytes = base64.b64decode(image_data)
-                    img_ext = 'png'
-                
-                # Calculate hash of image data before saving to verify uniqueness
-                import hashlib
-                img_hash = hashlib.md5(img_bytes).hexdigest()[:8]
-                
-                # Use unique filename with both scene number and index to avoid overwrites
-                img_path = os.path.join(temp_dir, f'img_scene_{scene_number:03d}_idx_{i:03d}.{img_ext}')
-                with open(img_path, 'wb') as f:
-                    f.write(img_bytes)
+                # Decoded bytes stay in memory and are piped straight to FFmpeg;
+                # the hash is used to verify uniqueness
+                img_bytes, img_hash = decoded_images[i]
                 
                 # Check if this is the same image as previous one
-                if images_with_scenes:
-                    prev_path = images_with_scenes[-1]['image_path']
-                    with open(prev_path, 'rb') as f:
-                        prev_hash = hashlib.md5(f.read()).hexdigest()[:8]
-                    if prev_hash == img_hash:
-                        print(f"[VIDEO] ⚠️  WARNING: Image {i+1} (Scene {scene_number}) has SAME HASH as previous image (Scene {images_with_scenes[-1]['scene_number']}) - DUPLICATE IMAGE!")
+                # (compare against the stored fingerprint rather than re-hashing)
+                if images_with_scenes and images_with_scenes[-1]['hash'] == img_hash:
+                    logger.warning("⚠️  WARNING: Image %s (Scene %s) has SAME HASH as previous image (Scene %s) - DUPLICATE IMAGE!", i+1, scene_number, images_with_scenes[-1]['scene_number'])
                 
                 # Get timing for this scene
                 timing = scene_timing_map.get(scene_number, {})
-                images_with_scenes.append({
+                entry = {
                     'scene_number': scene_number,
-                    'image_path': img_path,
+                    'image_bytes': img_bytes,
                     'start_time': timing.get('start_time', 0),
-                    'duration': timing.get('duration', audio_duration / len(images_result.data)),
+                    'duration': timing.get('duration', default_duration),
                     'hash': img_hash  # Store hash for debugging
-                })
-                print(f"[VIDEO]   Processed image {i+1}/{len(images_result.data)}: Scene {scene_number}, saved to {img_path} (hash: {img_hash}), duration: {timing.get('duration', 0):.2f}s")
-            
-            # Sort images by scene number to ensure correct order
-            images_with_scenes.sort(key=lambda x: x['scene_number'])
+                }
+                images_with_scenes.append(entry)
+                if scene_number:
+                    # If multiple images for same scene, use first one
+                    images_by_scene.setdefault(scene_number, entry)
+                logger.debug("  Processed image %s/%s: Scene %s, %s bytes (hash: %s), duration: %.2fs", i+1, len(images), scene_number, len(img_bytes), img_hash, timing.get('duration', 0))
             
             # Debug: Print final image list and verify alignment
-            print(f"[VIDEO] ===== VIDEO COMPILATION SUMMARY =====")
-            print(f"[VIDEO] Scene timings parsed from script (voiceover segments):")
-            for timing in scene_timings:
-                print(f"[VIDEO]   Scene {timing['scene_number']}: {timing['start_time']:.2f}s - {timing['end_time']:.2f}s (duration: {timing['duration']:.2f}s)")
-            print(f"[VIDEO] Images BEFORE remapping (from database):")
-            for img in images_with_scenes:
-                print(f"[VIDEO]   Image stored with scene_number {img['scene_number']}: {img['image_path']} (hash: {img.get('hash', 'N/A')[:8]})")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("===== VIDEO COMPILATION SUMMARY =====")
+                logger.debug("Scene timings parsed from script (voiceover segments):")
+                for timing in scene_timings:
+                    logger.debug("  Scene %s: %.2fs - %.2fs (duration: %.2fs)", timing['scene_number'], timing['start_time'], timing['end_time'], timing['duration'])
+                logger.debug("Images BEFORE remapping (from database):")
+                for img in sorted(images_with_scenes, key=lambda x: x['scene_number']):
+                    logger.debug("  Image stored with scene_number %s: %s bytes (hash: %s)", img['scene_number'], len(img['image_bytes']), img.get('hash', 'N/A')[:8])
             
             # IMPORTANT: Use images as-is by scene_number - NO remapping!
-            # Images are already sorted by scene_number and should match scene timings
+            # Images are looked up by scene_number and should match scene timings
             # The remapping was causing images to be used in wrong order
-            print(f"[VIDEO] Using images directly by scene_number (no remapping)...")
+            logger.debug("Using images directly by scene_number (no remapping)...")
             
-            # Sort images by scene_number to ensure correct order
-            images_with_scenes.sort(key=lambda x: x.get('scene_number', 0))
-            
-            # Create a map of scene_number -> image for quick lookup
-            images_by_scene = {}
-            for img in images_with_scenes:
-                scene_num = img.get('scene_number')
-                if scene_num:
-                    # If multiple images for same scene, use first one
-                    if scene_num not in images_by_scene:
-                        images_by_scene[scene_num] = img
-            
-            # Match images to scene timings by exact scene_number match
+            # Match images to scene timings by exact scene_number match.
+            # Fallbacks walk the sorted image scene numbers with a cursor that
+            # only moves forward, since scene numbers never leave `used_scene_nums`.
             matched_images = []
-            for timing in scene_timings:
-                expected_scene_num = timing['scene_number']
-                
-                if expected_scene_num in images_by_scene:
+            used_scene_nums = set()
+            remaining_scene_nums = sorted(images_by_scene)
+            next_idx = 0
+            for expected_scene_num, timing in scene_timing_map.items():
+                img = images_by_scene.get(expected_scene_num)
+                if img is not None:
                     # Use the image that matches this scene_number exactly
-                    img = images_by_scene[expected_scene_num]
                     matched_images.append({
                         'scene_number': expected_scene_num,
-                        'image_path': img['image_path'],
+                        'image_bytes': img['image_bytes'],
                         'start_time': timing['start_time'],
                         'duration': timing['duration'],
                         'hash': img.get('hash', '')
                     })
-                    print(f"[VIDEO]   ✓ Scene {expected_scene_num}: Using image with matching scene_number (hash: {img.get('hash', 'N/A')[:8]})")
+                    logger.debug("  ✓ Scene %s: Using image with matching scene_number (hash: %s)", expected_scene_num, img.get('hash', 'N/A')[:8])
                 else:
                     # No matching image for this scene
-                    print(f"[VIDEO]   ⚠️  Scene {expected_scene_num}: No image with matching scene_number found")
+                    logger.warning("  ⚠️  Scene %s: No image with matching scene_number found", expected_scene_num)
                     # Try to use next available image in order
                     # But only if we have images available
-                    available_scene_nums = sorted([s for s in images_by_scene.keys() if s not in [m['scene_number'] for m in matched_images]])
-                    if available_scene_nums:
+                    while next_idx < len(remaining_scene_nums) and remaining_scene_nums[next_idx] in used_scene_nums:
+                        next_idx += 1
+                    if next_idx < len(remaining_scene_nums):
                         # Use next available image
-                        next_scene = available_scene_nums[0]
+                        next_scene = remaining_scene_nums[next_idx]
                         img = images_by_scene[next_scene]
-                        print(f"[VIDEO]   ⚠️  Scene {expected_scene_num}: Using image from Scene {next_scene} as fallback (hash: {img.get('hash', 'N/A')[:8]})")
+                        logger.warning("  ⚠️  Scene %s: Using image from Scene %s as fallback (hash: %s)", expected_scene_num, next_scene, img.get('hash', 'N/A')[:8])
                         matched_images.append({
                             'scene_number': expected_scene_num,  # Map to expected scene
-                            'image_path': img['image_path'],
+                            'image_bytes': img['image_bytes'],
                             'start_time': timing['start_time'],
                             'duration': timing['duration'],
                             'hash': img.get('hash', '')
@@ -763,270 +912,422 @@ async def compile_video(
                     elif matched_images:
                         # Repeat last image
                         last_img = matched_images[-1]
-                        print(f"[VIDEO]   ⚠️  Scene {expected_scene_num}: Repeating last image from Scene {last_img['scene_number']}")
+                        logger.warning("  ⚠️  Scene %s: Repeating last image from Scene %s", expected_scene_num, last_img['scene_number'])
                         matched_images.append({
                             'scene_number': expected_scene_num,
-                            'image_path': last_img['image_path'],
+                            'image_bytes': last_img['image_bytes'],
                             'start_time': timing['start_time'],
                             'duration': timing['duration'],
                             'hash': last_img.get('hash', '')
                         })
+                    else:
+                        continue
+                used_scene_nums.add(expected_scene_num)
             
             # Replace with matched images
             if matched_images:
                 images_with_scenes = matched_images
-                print(f"[VIDEO] ✓ Successfully matched {len(matched_images)} images to {len(scene_timings)} scene timings")
+                logger.info("✓ Successfully matched %s images to %s scene timings", len(matched_images), len(scene_timings))
             else:
-                print(f"[VIDEO] ❌ ERROR: No images were matched! Original images list had {len(images_with_scenes)} images.")
-            
-            print(f"[VIDEO] Images AFTER remapping (final order matching script):")
-            for img in images_with_scenes:
-                print(f"[VIDEO]   Scene {img['scene_number']}: {img['image_path']} -> shows at {img['start_time']:.2f}s - {img['start_time'] + img['duration']:.2f}s (hash: {img.get('hash', 'N/A')[:8]})")
-            
-            # Verify alignment: each scene timing should have exactly one image
-            scene_numbers_in_timings = {t['scene_number'] for t in scene_timings}
-            scene_numbers_in_images = {img['scene_number'] for img in images_with_scenes}
-            
-            missing_scenes = scene_numbers_in_timings - scene_numbers_in_images
-            extra_scenes = scene_numbers_in_images - scene_numbers_in_timings
-            
-            if missing_scenes:
-                print(f"[VIDEO] ⚠️  WARNING: Scene timings exist for scenes {sorted(missing_scenes)} but NO IMAGES FOUND - these scenes will be blank!")
-            if extra_scenes:
-                print(f"[VIDEO] ⚠️  WARNING: Images exist for scenes {sorted(extra_scenes)} but NO SCENE TIMINGS - these images will be skipped!")
-            
-            # Check for duplicate scene numbers (multiple images for same scene)
-            scene_counts = {}
-            for img in images_with_scenes:
-                scene_num = img['scene_number']
-                scene_counts[scene_num] = scene_counts.get(scene_num, 0) + 1
-            
-            duplicates = {scene: count for scene, count in scene_counts.items() if count > 1}
-            if duplicates:
-                print(f"[VIDEO] ⚠️  WARNING: Multiple images for same scenes: {duplicates} - only first image will be used per scene!")
-            
-            # Verify image order matches scene order
-            image_scene_numbers = [img['scene_number'] for img in images_with_scenes]
-            timing_scene_numbers = [t['scene_number'] for t in scene_timings]
-            if image_scene_numbers != timing_scene_numbers:
-                print(f"[VIDEO] ⚠️  WARNING: Image scene order {image_scene_numbers} does NOT match timing scene order {timing_scene_numbers}!")
-            else:
-                print(f"[VIDEO] ✓ Image scene order matches timing scene order: {image_scene_numbers}")
-            
-            print(f"[VIDEO] =====================================")
+                logger.error("❌ ERROR: No images were matched! Original images list had %s images.", len(images_with_scenes))
+            
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Images AFTER remapping (final order matching script):")
+                for img in images_with_scenes:
+                    logger.debug("  Scene %s: %s bytes -> shows at %.2fs - %.2fs (hash: %s)", img['scene_number'], len(img['image_bytes']), img['start_time'], img['start_time'] + img['duration'], img.get('hash', 'N/A')[:8])
+            
+            # Matching yields exactly one image per timing, in timing order, so these
+            # alignment checks are diagnostics only and skipped outside DEBUG
+            if logger.isEnabledFor(logging.DEBUG):
+                # Verify alignment: each scene timing should have exactly one image
+                scene_numbers_in_timings = {t['scene_number'] for t in scene_timings}
+                scene_numbers_in_images = {img['scene_number'] for img in images_with_scenes}
+                
+                missing_scenes = scene_numbers_in_timings - scene_numbers_in_images
+                extra_scenes = scene_numbers_in_images - scene_numbers_in_timings
+                
+                if missing_scenes:
+                    logger.warning("⚠️  WARNING: Scene timings exist for scenes %s but NO IMAGES FOUND - these scenes will be blank!", sorted(missing_scenes))
+                if extra_scenes:
+                    logger.warning("⚠️  WARNING: Images exist for scenes %s but NO SCENE TIMINGS - these images will be skipped!", sorted(extra_scenes))
+                
+                # Check for duplicate scene numbers (multiple images for same scene)
+                scene_counts = {}
+                for img in images_with_scenes:
+                    scene_num = img['scene_number']
+                    scene_counts[scene_num] = scene_counts.get(scene_num, 0) + 1
+                
+                duplicates = {scene: count for scene, count in scene_counts.items() if count > 1}
+                if duplicates:
+                    logger.warning("⚠️  WARNING: Multiple images for same scenes: %s - only first image will be used per scene!", duplicates)
+                
+                # Verify image order matches scene order
+                image_scene_numbers = [img['scene_number'] for img in images_with_scenes]
+                timing_scene_numbers = [t['scene_number'] for t in scene_timings]
+                if image_scene_numbers != timing_scene_numbers:
+                    logger.warning("⚠️  WARNING: Image scene order %s does NOT match timing scene order %s!", image_scene_numbers, timing_scene_numbers)
+                else:
+                    logger.debug("✓ Image scene order matches timing scene order: %s", image_scene_numbers)
+                
+                logger.debug("=====================================")
             
             # Compile video with scene-specific timings
-            print(f"[VIDEO] Starting video compilation with FFmpeg...")
-            output_path = os.path.join(temp_dir, 'output.mp4')
-            success = _compile_video_with_scene_timings(
-                audio_path,
-                images_with_scenes,
-                output_path,
-                audio_duration
-            )
-            
-            if not success or not os.path.exists(output_path):
-                raise HTTPException(status_code=500, detail="Video compilation failed")
-            
-            # Read compiled video
-            print(f"[VIDEO] Reading compiled video...")
-            with open(output_path, 'rb') as f:
-                video_bytes = f.read()
-            
-            video_size_mb = len(video_bytes) / (1024 * 1024)
-            print(f"[VIDEO] ✓ Video compiled successfully ({video_size_mb:.2f} MB)")
-            
-            # Validate video file size
-            if len(video_bytes) < 100:
-                raise HTTPException(status_code=500, detail="Video file is too small or corrupted")
-            
-            # Check for MP4 file signature (MP4 files should have 'ftyp' at offset 4)
-            # Format: [4-byte size][4-byte type='ftyp'][...]
-            if len(video_bytes) < 8:
-                raise HTTPException(status_code=500, detail="Video file header is corrupted")
-            
-            box_size = int.from_bytes(video_bytes[0:4], byteorder='big')
-            box_type = video_bytes[4:8]
-            
-            print(f"[VIDEO] First box size: {box_size}, type: {box_type}")
-            
-            # MP4 files should start with 'ftyp' box
-            has_valid_header = (
-                box_type == b'ftyp' or
-                (len(video_bytes) > 20 and b'ftyp' in video_bytes[4:20])
-            )
+            # Store video file on disk instead of database (too large for DB).
+            # FFmpeg writes straight into the videos directory under a temporary
+            # name that is renamed into place once the file has been checked.
+            video_filepath = os.path.join(VIDEOS_DIR, f"{video_id}.mp4")
+            output_path = video_filepath + '.part'
             
-            if not has_valid_header:
-                print(f"[VIDEO] ❌ ERROR: Video file does not have valid MP4 header")
-                print(f"[VIDEO] First 32 bytes (hex): {video_bytes[:32].hex()}")
-                print(f"[VIDEO] First 32 bytes (ascii): {video_bytes[:32]}")
-                raise HTTPException(status_code=500, detail="Video file does not have valid MP4 format. File may be corrupted.")
-            else:
-                print(f"[VIDEO] ✅ Video file has valid MP4 header (ftyp box found)")
-            
-            # Verify file ends properly (should have some data, not truncated)
-            if len(video_bytes) < box_size:
-                print(f"[VIDEO] ⚠️  Warning: Video file may be truncated (size: {len(video_bytes)}, expected at least: {box_size})")
-            
-            # Verify video can be decoded/read before encoding to base64
-            # Quick sanity check: try to read first and last few bytes
-            if video_bytes[0:4] == b'\x00\x00\x00\x00' and len(video_bytes) > 1000:
-                print(f"[VIDEO] ⚠️  Warning: Video file starts with null bytes")
-            
-            # Encode to base64
-            print(f"[VIDEO] Encoding video to base64...")
-            video_base64 = base64.b64encode(video_bytes).decode('utf-8')
-            
-            # Verify base64 encoding
-            if len(video_base64) == 0:
-                raise HTTPException(status_code=500, detail="Video base64 encoding failed")
-            
-            # Verify we can decode it back (sanity check)
+            logger.info("Starting video compilation with FFmpeg...")
             try:
-                decoded_test = base64.b64decode(video_base64[:100])
-                if len(decoded_test) != 75:  # 100 chars base64 = ~75 bytes
-                    raise HTTPException(status_code=500, detail="Base64 encoding verification failed")
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Base64 encoding corrupted: {str(e)}")
-            
-            # Store video file on disk instead of database (too large for DB)
-            print(f"[VIDEO] Storing video file on disk...")
-            video_id = str(uuid.uuid4())
-            
-            # Create videos directory if it doesn't exist
-            videos_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'videos')
-            os.makedirs(videos_dir, exist_ok=True)
-            
-            # Save video file
-            video_filename = f"{video_id}.mp4"
-            video_filepath = os.path.join(videos_dir, video_filename)
-            with open(video_filepath, 'wb') as f:
-                f.write(video_bytes)
-            print(f"[VIDEO] ✓ Video saved to disk: {video_filepath} ({video_size_mb:.2f} MB)")
-            
-            # Store video metadata in database (without the actual video data)
-            print(f"[VIDEO] Saving video metadata to database...")
-            try:
-                insert_result = supabase.table('videos').insert({
-                    'id': video_id,
-                    'project_id': req.project_id,
-                    'script_id': script_id,
-                    'voiceover_id': voiceover_id,
-                    'video_data': None,  # Don't store video data in DB
-                    'video_url': f"/api/video/file/{video_id}",  # URL to download video
-                    'status': 'completed'
-                }).execute()
+                success = await _compile_video_with_scene_timings(
+                    audio_path,
+                    images_with_scenes,
+                    output_path,
+                    audio_duration
+                )
                 
-                # Check for errors
-                if hasattr(insert_result, 'error') and insert_result.error:
-                    error_detail = str(insert_result.error) if not isinstance(insert_result.error, bytes) else "Insert error"
-                    raise Exception(f"Supabase insert error: {error_detail}")
+                if not success or not os.path.exists(output_path):
+                    raise Exception("Video compilation failed")
                 
-                print(f"[VIDEO] ✓ Video metadata saved to database (ID: {video_id})")
-            except HTTPException:
-                # Re-raise HTTP exceptions as-is
-                raise
-            except Exception as db_error:
-                # Extract error message safely, ensuring it's JSON serializable
-                error_msg = "Database error occurred"
-                try:
-                    if isinstance(db_error, Exception):
-                        error_msg = str(db_error)
-                        # Remove any bytes-like objects from the error message
-                        if isinstance(error_msg, bytes):
-                            error_msg = error_msg.decode('utf-8', errors='ignore')
-                    elif isinstance(db_error, bytes):
-                        error_msg = db_error.decode('utf-8', errors='ignore')
-                    else:
-                        error_msg = str(db_error)
-                    
-                    # Ensure error message is JSON serializable
-                    import json
-                    json.dumps({'error': error_msg})
-                except (TypeError, UnicodeDecodeError, ValueError):
-                    error_msg = "Database error occurred (non-serializable error message)"
-                except Exception:
-                    error_msg = "Database error occurred"
+                video_size = os.path.getsize(output_path)
+                video_size_mb = video_size / (1024 * 1024)
+                logger.info("✓ Video compiled successfully (%.2f MB)", video_size_mb)
+                
+                # Validate video file size
+                if video_size < 100:
+                    raise Exception("Video file is too small or corrupted")
+                
+                # Only the header is needed for the signature checks below
+                with open(output_path, 'rb') as f:
+                    header = f.read(32)
+                
+                # Check for MP4 file signature (MP4 files should have 'ftyp' at offset 4)
+                # Format: [4-byte size][4-byte type='ftyp'][...]
+                box_size, box_type = _BOX_HEADER.unpack_from(header, 0)
+                
+                logger.debug("First box size: %s, type: %s", box_size, box_type)
+                
+                # MP4 files should start with 'ftyp' box
+                has_valid_header = box_type == b'ftyp' or b'ftyp' in header[4:20]
+                
+                if not has_valid_header:
+                    logger.error("❌ ERROR: Video file does not have valid MP4 header")
+                    logger.error("First 32 bytes (hex): %s", header.hex())
+                    logger.error("First 32 bytes (ascii): %s", header)
+                    raise Exception("Video file does not have valid MP4 format. File may be corrupted.")
+                else:
+                    logger.info("✅ Video file has valid MP4 header (ftyp box found)")
+                
+                # Verify file ends properly (should have some data, not truncated)
+                if video_size < box_size:
+                    logger.warning("⚠️  Warning: Video file may be truncated (size: %s, expected at least: %s)", video_size, box_size)
+                
+                if box_size == 0 and video_size > 1000:
+                    logger.warning("⚠️  Warning: Video file starts with null bytes")
                 
-                print(f"[VIDEO] ❌ Database save error: {error_msg}")
-                raise HTTPException(status_code=500, detail=f"Failed to save video to database: {error_msg}")
+                os.replace(output_path, video_filepath)
+            finally:
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+            logger.info("✓ Video saved to disk: %s (%.2f MB)", video_filepath, video_size_mb)
+            
+            # Mark the video row complete now that the file is on disk
+            logger.info("Saving video metadata to database...")
+            supabase.table('videos').update({
+                'video_url': f"/api/video/file/{video_id}",  # URL to download video
+                'status': 'completed'
+            }).eq('id', video_id).execute()
+            logger.info("✓ Video metadata saved to database (ID: %s)", video_id)
             
             # Update project status
             try:
-                supabase.table('projects').update({'status': 'video'}).eq('id', req.project_id).execute()
-                print(f"[VIDEO] ✓ Project status updated to 'video'")
+                supabase.table('projects').update({'status': 'video'}).eq('id', project_id).execute()
+                logger.info("✓ Project status updated to 'video'")
             except Exception as e:
-                print(f"[VIDEO] ⚠️  Failed to update project status: {e}")
+                logger.warning("⚠️  Failed to update project status: %s", e)
             
-            print(f"[VIDEO] ✅ Compilation complete!")
-            # Don't return video_data_url here - it's huge and causes serialization issues
-            # Frontend can fetch it separately using GET /api/video/project/{project_id}
-            return {
-                'success': True,
-                'video_id': video_id,
-                'video_url': f"/api/video/file/{video_id}"
-            }
+            logger.info("✅ Compilation complete!")
             
-        finally:
-            # Cleanup temp directory
-            print(f"[VIDEO] Cleaning up temporary files...")
-            import shutil
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            print(f"[VIDEO] ✓ Cleanup complete")
+    except Exception as e:
+        error_msg = str(e)
+        logger.exception("❌ Video compilation error: %s", error_msg)
+        try:
+            supabase.table('videos').update({
+                'status': 'failed',
+                'error_message': error_msg
+            }).eq('id', video_id).execute()
+        except Exception as db_error:
+            logger.warning("⚠️  Failed to record compilation failure: %s", db_error)
+
+
+def _compile_job_lost(video: dict) -> bool:
+    """Whether a 'processing' video has outlived its compile job."""
+    task_name = f"compile-{video['id']}"
+    if any(task.get_name() == task_name for task in _compile_tasks):
+        return False
+    if not video.get('created_at'):
+        return False
+    queued_at = datetime.fromisoformat(video['created_at'])
+    return datetime.now(timezone.utc) - queued_at > COMPILE_JOB_TIMEOUT
+
+
+@router.post("/compile", status_code=202)
+async def compile_video(
+    req: VideoCompileRequest,
+    user_id: str = Depends(verify_token)
+):
+    """Queue video compilation from script, voiceover, and images.
+
+    Returns 202 with the new video ID; poll `/compile/status/{video_id}` for
+    the result.
+    """
+    logger.info("Starting compilation for project %s", req.project_id)
+    try:
+        supabase = get_supabase()
+        
+        # Check FFmpeg availability
+        logger.info("Checking FFmpeg availability...")
+        if not await _check_ffmpeg():
+            raise HTTPException(status_code=503, detail="FFmpeg is not available. Please install FFmpeg.")
+        logger.info("✓ FFmpeg is available")
+        
+        # Verify project ownership and fetch the latest script in one round-trip
+        logger.info("Verifying project ownership and fetching script...")
+        project_query = (
+            supabase.table('projects')
+            .select('id, scripts(id, raw_script, edited_script, created_at)')
+            .eq('id', req.project_id)
+            .eq('user_id', user_id)
+            .limit(1, foreign_table='scripts')
+        )
+        project_result = order_embedded(project_query, 'scripts', 'created_at', desc=True).execute()
+        if not project_result.data:
+            raise HTTPException(status_code=403, detail="Project not found or access denied")
+        logger.info("✓ Project ownership verified")
+        
+        scripts = project_result.data[0].get('scripts') or []
+        if not scripts:
+            raise HTTPException(status_code=400, detail="No script found for this project")
+        
+        script = scripts[0]
+        script_id = script['id']
+        script_text = script.get('edited_script') or script.get('raw_script', '')
+        logger.info("✓ Script found (ID: %s, length: %s chars)", script_id, len(script_text))
+        
+        # Voiceover, scenes and images all key off the script, so fetch them
+        # concurrently instead of one round-trip after another
+        logger.info("Fetching voiceover, scenes and images...")
+        voiceover_query = (
+            supabase.table('voiceovers')
+            .select('id, audio_data_url, audio_storage_path, status')
+            .eq('script_id', script_id)
+            .order('created_at', desc=True)
+            .limit(1)
+        )
+        scenes_query = (
+            supabase.table('scenes')
+            .select('id, scene_number')
+            .eq('script_id', script_id)
+            .order('scene_number', desc=False)
+        )
+        # Join with scenes to get scene_number
+        images_query = (
+            supabase.table('images')
+            .select('id, scene_id, image_data, scenes!inner(scene_number, script_id)')
+            .eq('scenes.script_id', script_id)
+            .order('scenes(scene_number)', desc=False)
+        )
+        voiceover_result, scenes_result, images_result = await asyncio.gather(
+            asyncio.to_thread(voiceover_query.execute),
+            asyncio.to_thread(scenes_query.execute),
+            asyncio.to_thread(images_query.execute),
+        )
+        
+        if not voiceover_result.data:
+            raise HTTPException(status_code=400, detail="No voiceover found for this project")
+        
+        voiceover = voiceover_result.data[0]
+        voiceover_id = voiceover['id']
+        audio_storage_path = voiceover.get('audio_storage_path')
+        audio_data_url = voiceover.get('audio_data_url') or ''
+        
+        if voiceover.get('status') != 'complete':
+            # Audio is still being synthesized in the background (or failed)
+            raise HTTPException(status_code=409, detail="Voiceover not ready")
+        if not audio_storage_path and not audio_data_url:
+            raise HTTPException(status_code=400, detail="Voiceover audio data not found")
+        logger.info("✓ Voiceover found (ID: %s, audio: %s)", voiceover_id, audio_storage_path or f'{len(audio_data_url)} chars inline')
+        
+        if not scenes_result.data:
+            raise HTTPException(status_code=400, detail="No scenes found for this project")
+        
+        scene_map = {s['id']: s['scene_number'] for s in scenes_result.data}
+        logger.info("✓ Found %s scenes", len(scene_map))
+        
+        logger.info("✓ Found %s images", len(images_result.data))
+        
+        # Debug: Print all images and their scene numbers (hashing only runs at DEBUG)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Images with scene mapping:")
+            logger.debug("Raw images_result.data structure (first image):")
+            if images_result.data and len(images_result.data) > 0:
+                logger.debug("  First image keys: %s", list(images_result.data[0].keys()))
+                logger.debug("  First image scenes value: %s", images_result.data[0].get('scenes'))
+                logger.debug("  First image scenes type: %s", type(images_result.data[0].get('scenes')))
+            
+            for idx, img in enumerate(images_result.data):
+                # Try multiple ways to extract scene_number from join
+                scene_num = None
+                scenes_data = img.get('scenes')
+                
+                # Handle different Supabase join result formats
+                if isinstance(scenes_data, dict):
+                    scene_num = scenes_data.get('scene_number')
+                elif isinstance(scenes_data, list) and len(scenes_data) > 0:
+                    scene_num = scenes_data[0].get('scene_number')
+                
+                scene_id = img.get('scene_id')
+                mapped_scene = scene_map.get(scene_id, 'NOT FOUND') if scene_id else 'NO_SCENE_ID'
+                
+                # Use mapped_scene if join didn't work
+                if scene_num is None and mapped_scene != 'NOT FOUND':
+                    scene_num = mapped_scene
+                
+                # Calculate image data hash for uniqueness check
+                img_data = img.get('image_data', '') or img.get('image_data_url', '')
+                img_hash = 'NO_DATA'
+                if img_data:
+                    img_hash = _content_hash(img_data[:1000].encode())
+                
+                logger.debug("  [%s] Image %s... scene_id=%s, scene_number=%s, hash=%s", idx+1, img.get('id')[:8], scene_id, scene_num, img_hash)
+        
+        if not images_result.data:
+            raise HTTPException(status_code=400, detail="No images found for this project")
+        logger.info("✓ Found %s images", len(images_result.data))
+        
+        # Record the video row up front so the client can poll its status
+        video_id = str(uuid.uuid4())
+        supabase.table('videos').insert({
+            'id': video_id,
+            'project_id': req.project_id,
+            'script_id': script_id,
+            'voiceover_id': voiceover_id,
+            'video_data': None,  # Don't store video data in DB
+            'status': 'processing'
+        }).execute()
+        
+        # Encode in the background; holding the request open for the whole
+        # FFmpeg run ties up a worker and trips client timeouts
+        task = asyncio.create_task(_run_compile_job(
+            video_id,
+            req.project_id,
+            script_text,
+            audio_data_url,
+            audio_storage_path,
+            images_result.data,
+            scene_map,
+        ), name=f"compile-{video_id}")
+        _compile_tasks.add(task)
+        task.add_done_callback(_compile_tasks.discard)
+        
+        logger.info("✓ Compilation queued (video ID: %s)", video_id)
+        return {
+            'success': True,
+            'video_id': video_id,
+            'status': 'processing',
+            'status_url': f"/api/video/compile/status/{video_id}"
+        }
             
     except HTTPException as e:
-        print(f"[VIDEO] ❌ HTTP Exception: {e.status_code} - {e.detail}")
+        logger.error("❌ HTTP Exception: %s - %s", e.status_code, e.detail)
         raise
     except Exception as e:
         error_msg = str(e)
-        print(f"[VIDEO] ❌ Video compilation error: {error_msg}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Video compilation error: %s", error_msg)
         # Ensure error message is JSON serializable
         if isinstance(e, bytes):
             error_msg = e.decode('utf-8', errors='ignore')
         raise HTTPException(status_code=500, detail=f"Video compilation failed: {error_msg}")
 
 
-@router.get("/file/{video_id}")
-async def get_video_file(
+@router.get("/compile/status/{video_id}")
+async def get_compile_status(
     video_id: str,
     user_id: str = Depends(verify_token)
 ):
-    """Serve video file from disk."""
+    """Report the progress of a queued compilation."""
     try:
         supabase = get_supabase()
         
-        # Verify video exists and user has access
         video_result = (
             supabase.table('videos')
-            .select('project_id')
+            .select('id, project_id, status, error_message, video_url, created_at, projects!inner(user_id)')
             .eq('id', video_id)
-            .single()
+            .limit(1)
             .execute()
         )
         
         if not video_result.data:
             raise HTTPException(status_code=404, detail="Video not found")
+        video = video_result.data[0]
         
-        # Verify project ownership
-        project_result = supabase.table('projects').select('id').eq('id', video_result.data['project_id']).eq('user_id', user_id).execute()
-        if not project_result.data:
+        # Verify project ownership (joined in the same query)
+        if _owner_user_id(video) != user_id:
             raise HTTPException(status_code=403, detail="Access denied")
         
-        # Read video file from disk (same path calculation as in compile endpoint)
-        videos_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'videos')
-        video_filepath = os.path.join(videos_dir, f"{video_id}.mp4")
+        if video.get('status') == 'processing' and _compile_job_lost(video):
+            logger.warning("Compilation %s has been processing too long; marking it failed", video_id)
+            video['status'] = 'failed'
+            video['error_message'] = 'Compilation was interrupted; please try again'
+            supabase.table('videos').update({
+                'status': video['status'],
+                'error_message': video['error_message']
+            }).eq('id', video_id).eq('status', 'processing').execute()
         
-        print(f"[VIDEO] Looking for video file at: {video_filepath}")
-        print(f"[VIDEO] Videos directory: {videos_dir}")
-        print(f"[VIDEO] Directory exists: {os.path.exists(videos_dir)}")
+        return {
+            'success': True,
+            'video_id': video_id,
+            'status': video.get('status'),
+            'error_message': video.get('error_message'),
+            'video_url': video.get('video_url')
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_msg = str(e)
+        logger.error("Failed to fetch compile status: %s", error_msg)
+        raise HTTPException(status_code=500, detail=f"Failed to fetch compile status: {error_msg}")
+
+
+@router.get("/file/{video_id}")
+async def get_video_file(
+    video_id: str,
+    user_id: str = Depends(verify_token)
+):
+    """Serve video file from disk."""
+    try:
+        supabase = get_supabase()
+        
+        # Verify video exists and user has access
+        owner_id = _resolve_video_owner(supabase, video_id)
+        if not owner_id:
+            raise HTTPException(status_code=404, detail="Video not found")
+        if owner_id != user_id:
+            raise HTTPException(status_code=403, detail="Access denied")
+        
+        # Read video file from disk (same directory the compile job writes to)
+        video_filepath = os.path.join(VIDEOS_DIR, f"{video_id}.mp4")
+        
+        logger.debug("Looking for video file at: %s", video_filepath)
+        logger.debug("Videos directory: %s", VIDEOS_DIR)
         
         if not os.path.exists(video_filepath):
             # List files in directory for debugging
-            if os.path.exists(videos_dir):
-                files = os.listdir(videos_dir)
-                print(f"[VIDEO] Files in videos directory: {files[:10]}")
+            if logger.isEnabledFor(logging.DEBUG):
+                files = os.listdir(VIDEOS_DIR)
+                logger.debug("Files in videos directory: %s", files[:10])
             raise HTTPException(status_code=404, detail=f"Video file not found on server: {video_filepath}")
         
         from fastapi.responses import FileResponse
@@ -1040,7 +1341,7 @@ async def get_video_file(
         raise
     except Exception as e:
         error_msg = str(e)
-        print(f"[VIDEO] Failed to serve video file: {error_msg}")
+        logger.error("Failed to serve video file: %s", error_msg)
         raise HTTPException(status_code=500, detail=f"Failed to serve video: {error_msg}")
 
 
@@ -1053,55 +1354,27 @@ async def get_video_for_project(
     try:
         supabase = get_supabase()
         
-        # Verify project ownership
-        project_result = supabase.table('projects').select('id').eq('id', project_id).eq('user_id', user_id).execute()
+        # Verify project ownership and get the latest finished video in one
+        # round-trip (exclude video_data to avoid serialization issues)
+        project_query = (
+            supabase.table('projects')
+            .select('id, videos(id, project_id, script_id, voiceover_id, video_url, status, error_message, created_at, updated_at)')
+            .eq('id', project_id)
+            .eq('user_id', user_id)
+            .eq('videos.status', 'completed')
+            .limit(1, foreign_table='videos')
+        )
+        project_result = order_embedded(project_query, 'videos', 'created_at', desc=True).execute()
         if not project_result.data:
             raise HTTPException(status_code=403, detail="Project not found or access denied")
         
-        # Get latest video for project (exclude video_data to avoid serialization issues)
-        video_result = (
-            supabase.table('videos')
-            .select('id, project_id, script_id, voiceover_id, video_url, status, error_message, created_at, updated_at')
-            .eq('project_id', project_id)
-            .order('created_at', desc=True)
-            .limit(1)
-            .execute()
-        )
-        
-        video = video_result.data[0] if video_result.data else None
+        videos = project_result.data[0].get('videos') or []
+        video = videos[0] if videos else None
         
-        # If video exists, set the video URL (new format uses file serving)
+        # Videos are served from disk via /file/{id}; legacy rows that kept the
+        # bytes in Postgres are moved there by scripts/migrate_video_data_to_files.py
         if video:
-            if video.get('video_url'):
-                # New format: video stored on disk, URL points to file endpoint
-                video['video_data_url'] = video['video_url']
-            else:
-                # Old format: try to get video_data from database (for backwards compatibility)
-                video_data_result = (
-                    supabase.table('videos')
-                    .select('video_data')
-                    .eq('id', video['id'])
-                    .single()
-                    .execute()
-                )
-                
-                if video_data_result.data and video_data_result.data.get('video_data'):
-                    video_data = video_data_result.data['video_data']
-                    print(f"[VIDEO] Retrieved video_data type: {type(video_data)}")
-                    
-                    # Handle both formats: base64 text (new) or bytes (old)
-                    if isinstance(video_data, bytes):
-                        video_base64 = base64.b64encode(video_data).decode('utf-8')
-                        video['video_data_url'] = f"data:video/mp4;base64,{video_base64}"
-                    elif isinstance(video_data, str):
-                        if video_data.startswith('data:video'):
-                            video['video_data_url'] = video_data
-                        else:
-                            video['video_data_url'] = f"data:video/mp4;base64,{video_data}"
-                    else:
-                        video['video_data_url'] = None
-                else:
-                    video['video_data_url'] = None
+            video['video_data_url'] = video.get('video_url')
         
         return {
             'success': True,
@@ -1112,9 +1385,7 @@ async def get_video_for_project(
         raise
     except Exception as e:
         error_msg = str(e)
-        print(f"[VIDEO] Failed to fetch video: {error_msg}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Failed to fetch video: %s", error_msg)
         # Ensure error message is JSON serializable
         if isinstance(e, bytes):
             error_msg = e.decode('utf-8', errors='ignore')
@@ -1,16 +1,106 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
-import base64
-import uuid
-# datetime import removed as it's not used in current schema
+from datetime import datetime, timedelta, timezone
+import asyncio
+import hashlib
+
+import httpx
 
 from auth.verify import verify_token
-from db.client import get_supabase
+from db.client import get_supabase, order_embedded
 from services.system_tts import system_tts, get_voice_by_name
 
 router = APIRouter()
 
+# Supabase Storage bucket holding generated voiceover audio
+VOICEOVER_BUCKET = 'voiceovers'
+# Lifetime of the signed playback URLs handed to the client
+AUDIO_URL_TTL = 3600
+# Chunk size when relaying stored audio to the client
+AUDIO_STREAM_CHUNK = 64 * 1024
+# Synthesized audio is stored content-addressed by (model, voice, text) under
+# this prefix, so repeated requests reuse the WAV instead of re-running TTS
+TTS_CACHE_PREFIX = 'tts-cache'
+
+# Cache paths known to exist in Storage, to skip the lookup on repeat hits
+_tts_cached_paths: set[str] = set()
+# Strong references to in-flight synthesis tasks so they aren't garbage collected
+_synthesis_tasks: set[asyncio.Task] = set()
+# A row still 'pending' this long after it was queued, with no synthesis task
+# in this process, was lost (e.g. to a restart) and is reported as failed
+PENDING_VOICEOVER_TIMEOUT = timedelta(minutes=10)
+
+
+def _signed_audio_url(supabase, path: str) -> str:
+    """Signed Storage URL the browser can play directly, without proxying through the API."""
+    signed = supabase.storage.from_(VOICEOVER_BUCKET).create_signed_url(path, AUDIO_URL_TTL)
+    return signed.get('signedURL') or signed.get('signedUrl')
+
+def _tts_cache_path(model_id: str, voice_id: str, text: str) -> str:
+    """Storage path of the cached audio for this synthesis request."""
+    key = hashlib.sha256(f"{model_id}|{voice_id}|{text}".encode('utf-8')).hexdigest()
+    return f"{TTS_CACHE_PREFIX}/{key}.wav"
+
+
+def _tts_cache_exists(supabase, path: str) -> bool:
+    """Whether the cached audio at `path` is already in Storage."""
+    if path in _tts_cached_paths:
+        return True
+    folder, name = path.rsplit('/', 1)
+    try:
+        entries = supabase.storage.from_(VOICEOVER_BUCKET).list(folder, {'search': name, 'limit': 1})
+    except Exception as e:
+        print(f"Warning: TTS cache lookup failed: {str(e)}")
+        return False
+    if any(entry.get('name') == name for entry in entries or []):
+        _tts_cached_paths.add(path)
+        return True
+    return False
+
+async def _synthesize_and_store(voiceover_id: str, text: str, voice_id: str, audio_storage_path: str) -> None:
+    """Run TTS for a pending voiceover, upload the WAV and mark the row complete (or failed)."""
+    supabase = get_supabase()
+    try:
+        audio = await asyncio.to_thread(system_tts.generate_speech, text, voice_id)
+        # Store the raw WAV in Storage; only the object path goes into Postgres
+        await asyncio.to_thread(
+            supabase.storage.from_(VOICEOVER_BUCKET).upload,
+            audio_storage_path,
+            bytes(audio),
+            {'content-type': 'audio/wav', 'upsert': 'true'}
+        )
+        _tts_cached_paths.add(audio_storage_path)
+        status = 'complete'
+    except Exception as e:
+        print(f"Voiceover {voiceover_id} synthesis failed: {str(e)}")
+        status = 'failed'
+    try:
+        # Scoped to this audio path so a superseded request can't overwrite a newer one
+        await asyncio.to_thread(
+            supabase.table('voiceovers').update({'status': status, 'updated_at': _utcnow()})
+            .eq('id', voiceover_id)
+            .eq('audio_storage_path', audio_storage_path)
+            .execute
+        )
+    except Exception as e:
+        print(f"Database error updating voiceover {voiceover_id}: {str(e)}")
+
+def _utcnow() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _synthesis_lost(voiceover: dict) -> bool:
+    """Whether a 'pending' row has outlived its synthesis task."""
+    task_name = f"voiceover-{voiceover['id']}"
+    if any(task.get_name() == task_name for task in _synthesis_tasks):
+        return False
+    queued_at = voiceover.get('updated_at') or voiceover.get('created_at')
+    if not queued_at:
+        return False
+    return datetime.now(timezone.utc) - datetime.fromisoformat(queued_at) > PENDING_VOICEOVER_TIMEOUT
+
 class VoiceoverGenerationRequest(BaseModel):
     project_id: str
     script_id: str
@@ -21,7 +111,9 @@ class VoiceoverGenerationRequest(BaseModel):
 class VoiceoverGenerationResponse(BaseModel):
     success: bool
     voiceover_id: str
-    audio_data_url: str
+    status: str = "complete"
+    audio_url: Optional[str] = None  # Set once the audio is stored
+    status_url: Optional[str] = None  # Poll this while the status is 'pending'
 
 class VoiceoverUpdateRequest(BaseModel):
     edited_text: str
@@ -31,67 +123,91 @@ async def generate_voiceover(
     request: VoiceoverGenerationRequest,
     user_id: str = Depends(verify_token)
 ):
-    """Generate voiceover using System TTS and save to database"""
+    """
+    Generate voiceover using System TTS and save to database.
+    
+    Cached audio is returned immediately; otherwise the row is saved as
+    'pending', synthesis runs in the background and the response is
+    202 Accepted with a `status_url` to poll.
+    """
     try:
         supabase = get_supabase()
         
-        # Verify project ownership
-        project_result = supabase.table('projects').select('id').eq('id', request.project_id).eq('user_id', user_id).execute()
-        if not project_result.data:
-            raise HTTPException(status_code=403, detail="Project not found or access denied")
-        
-        # Verify script ownership
-        script_result = supabase.table('scripts').select('id').eq('id', request.script_id).eq('project_id', request.project_id).execute()
+        # Verify script and project ownership in one joined query (the supabase
+        # client is blocking, so it runs off the event loop)
+        script_query = (
+            supabase.table('scripts')
+            .select('id, projects!inner(id, user_id)')
+            .eq('id', request.script_id)
+            .eq('project_id', request.project_id)
+            .limit(1)
+        )
+        script_result = await asyncio.to_thread(script_query.execute)
         if not script_result.data:
             raise HTTPException(status_code=403, detail="Script not found or access denied")
+        if (script_result.data[0].get('projects') or {}).get('user_id') != user_id:
+            raise HTTPException(status_code=403, detail="Project not found or access denied")
         
-        # Generate voiceover using System TTS
-        try:
-            # Get system voice ID
-            system_voice_id = get_voice_by_name(request.voice_id)
-            
-            # Generate speech using system TTS
-            audio = system_tts.generate_speech(request.text, system_voice_id)
-            
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"System TTS generation failed: {str(e)}")
-        
-        # Convert audio to base64
-        audio_bytes = bytes(audio)
-        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-        audio_data_url = f"data:audio/wav;base64,{audio_base64}"
+        # Get system voice ID
+        system_voice_id = get_voice_by_name(request.voice_id)
         
-        # Generate voiceover ID
-        voiceover_id = str(uuid.uuid4())
+        # Reuse previously synthesized audio for the same text and voice
+        audio_storage_path = _tts_cache_path(request.model_id or 'system_tts', system_voice_id, request.text)
+        cached = await asyncio.to_thread(_tts_cache_exists, supabase, audio_storage_path)
+        if cached:
+            print(f"TTS cache hit: {audio_storage_path}")
         
-        # Save to database (enforce one voiceover per script)
+        # Save to database; the unique script_id constraint keeps one voiceover
+        # per script, so an existing row is updated in the same statement and
+        # keeps its id (new rows get one from the column default).
+        # Uncached audio is recorded as pending until the background task stores it
         try:
-            print(f"Saving voiceover {voiceover_id} for script {request.script_id}")
-            # Remove any existing voiceover for this script to keep one-per-script invariant
-            try:
-                supabase.table('voiceovers').delete().eq('script_id', request.script_id).execute()
-            except Exception as cleanup_err:
-                print(f"Warning: failed to cleanup existing voiceovers for script {request.script_id}: {str(cleanup_err)}")
-            voiceover_result = supabase.table('voiceovers').insert({
-                'id': voiceover_id,
-                'script_id': request.script_id,
-                'audio_data_url': audio_data_url,
-                'status': 'complete'
-            }).execute()
+            print(f"Saving voiceover for script {request.script_id}")
+            voiceover_result = await asyncio.to_thread(
+                supabase.table('voiceovers').upsert({
+                    'script_id': request.script_id,
+                    'audio_storage_path': audio_storage_path,
+                    'status': 'complete' if cached else 'pending',
+                    'updated_at': _utcnow()
+                }, on_conflict='script_id').execute
+            )
             
             print(f"Voiceover saved successfully: {voiceover_result.data}")
             
             if not voiceover_result.data:
                 raise HTTPException(status_code=500, detail="Failed to save voiceover to database")
+            voiceover_id = voiceover_result.data[0]['id']
                 
+        except HTTPException:
+            raise
         except Exception as e:
             print(f"Database error saving voiceover: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
         
+        if not cached:
+            # Synthesis and upload run after the response; the client polls
+            # GET /{voiceover_id} until the status is 'complete'
+            task = asyncio.create_task(
+                _synthesize_and_store(voiceover_id, request.text, system_voice_id, audio_storage_path),
+                name=f"voiceover-{voiceover_id}"
+            )
+            _synthesis_tasks.add(task)
+            task.add_done_callback(_synthesis_tasks.discard)
+            return JSONResponse(
+                status_code=202,
+                content=VoiceoverGenerationResponse(
+                    success=True,
+                    voiceover_id=voiceover_id,
+                    status='pending',
+                    status_url=f"/api/voiceover/{voiceover_id}"
+                ).model_dump()
+            )
+        
         return VoiceoverGenerationResponse(
             success=True,
             voiceover_id=voiceover_id,
-            audio_data_url=audio_data_url
+            status='complete',
+            audio_url=await asyncio.to_thread(_signed_audio_url, supabase, audio_storage_path)
         )
         
     except HTTPException:
@@ -137,54 +253,45 @@ async def get_voiceovers_for_project(
     project_id: str,
     user_id: str = Depends(verify_token)
 ):
-    """Get all voiceovers for a project"""
+    """Get voiceover metadata for a project (audio via signed `audio_url`, or lazily from /{id}/audio)"""
     try:
         supabase = get_supabase()
         
-        # Verify project ownership
-        project_result = supabase.table('projects').select('id').eq('id', project_id).eq('user_id', user_id).execute()
-        if not project_result.data:
-            raise HTTPException(status_code=403, detail="Project not found or access denied")
-        
-        # Fetch only the most recent script for this project to avoid heavy queries
-        latest_script_id: str | None = None
+        # Verify project ownership and fetch the most recent script with its
+        # latest voiceover in one query
         try:
-            latest_script_result = (
+            project_query = (
                 supabase
-                .table('scripts')
-                .select('id, created_at')
-                .eq('project_id', project_id)
-                .order('created_at', desc=True)
-                .limit(1)
-                .execute()
+                .table('projects')
+                .select('id, scripts(id, created_at, voiceovers(id, script_id, audio_storage_path, status, created_at))')
+                .eq('id', project_id)
+                .eq('user_id', user_id)
+                .limit(1, foreign_table='scripts')
+                .limit(1, foreign_table='scripts.voiceovers')
             )
-            if latest_script_result.data:
-                latest_script_id = latest_script_result.data[0]['id']
+            order_embedded(project_query, 'scripts', 'created_at', desc=True)
+            order_embedded(project_query, 'scripts.voiceovers', 'created_at', desc=True)
+            project_result = await asyncio.to_thread(project_query.execute)
         except Exception as e:
-            print(f"Error fetching latest script: {str(e)}")
-            raise HTTPException(status_code=500, detail="Failed to fetch scripts for project")
+            # Propagate as a server error so the client doesn't interpret as empty
+            print(f"Error fetching voiceovers: {str(e)}")
+            raise HTTPException(status_code=500, detail="Failed to fetch voiceovers for project")
 
-        if not latest_script_id:
+        if not project_result.data:
+            raise HTTPException(status_code=403, detail="Project not found or access denied")
+        scripts = project_result.data[0].get('scripts') or []
+        if not scripts:
             # No scripts yet
             return {"success": True, "voiceovers": []}
 
-        # Fetch only the most recent voiceover for the latest script
-        try:
-            voiceover_result = (
-                supabase
-                .table('voiceovers')
-                .select('*')
-                .eq('script_id', latest_script_id)
-                .order('created_at', desc=True)
-                .limit(1)
-                .execute()
-            )
-            voiceovers = voiceover_result.data or []
-            print(f"Found {len(voiceovers)} voiceovers for latest script {latest_script_id}")
-        except Exception as e:
-            # Propagate as a server error so the client doesn't interpret as empty
-            print(f"Error fetching voiceovers: {str(e)}")
-            raise HTTPException(status_code=500, detail="Failed to fetch voiceovers for project")
+        latest_script = scripts[0]
+        voiceovers = latest_script.get('voiceovers') or []
+        for voiceover in voiceovers:
+            path = voiceover.get('audio_storage_path')
+            # Pending audio isn't in Storage yet; the client polls /{id} for it
+            if path and voiceover.get('status') == 'complete':
+                voiceover['audio_url'] = await asyncio.to_thread(_signed_audio_url, supabase, path)
+        print(f"Found {len(voiceovers)} voiceovers for latest script {latest_script['id']}")
 
         return {"success": True, "voiceovers": voiceovers}
         
@@ -192,3 +299,158 @@ async def get_voiceovers_for_project(
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch voiceovers: {str(e)}")
+
+@router.get("/{voiceover_id}")
+async def get_voiceover_status(
+    voiceover_id: str,
+    user_id: str = Depends(verify_token)
+):
+    """Current status of a voiceover, with its signed `audio_url` once complete"""
+    try:
+        supabase = get_supabase()
+        
+        # Verify voiceover ownership through script -> project relationship
+        voiceover_query = (
+            supabase.table('voiceovers')
+            .select('id, script_id, audio_storage_path, status, created_at, updated_at, scripts!inner(projects!inner(user_id))')
+            .eq('id', voiceover_id)
+            .limit(1)
+        )
+        voiceover_result = await asyncio.to_thread(voiceover_query.execute)
+        if not voiceover_result.data:
+            raise HTTPException(status_code=404, detail="Voiceover not found")
+        voiceover = voiceover_result.data[0]
+        if voiceover['scripts']['projects']['user_id'] != user_id:
+            raise HTTPException(status_code=403, detail="Access denied")
+        
+        status = voiceover.get('status')
+        if status == 'pending' and _synthesis_lost(voiceover):
+            print(f"Voiceover {voiceover_id} has been pending too long; marking it failed")
+            await asyncio.to_thread(
+                supabase.table('voiceovers').update({'status': 'failed', 'updated_at': _utcnow()})
+                .eq('id', voiceover_id)
+                .eq('status', 'pending')
+                .execute
+            )
+            status = 'failed'
+        audio_url = None
+        if status == 'complete' and voiceover.get('audio_storage_path'):
+            audio_url = await asyncio.to_thread(_signed_audio_url, supabase, voiceover['audio_storage_path'])
+        
+        return {
+            "success": True,
+            "voiceover_id": voiceover_id,
+            "script_id": voiceover.get('script_id'),
+            "status": status,
+            "audio_url": audio_url,
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch voiceover status: {str(e)}")
+
+@router.get("/{voiceover_id}/audio")
+async def get_voiceover_audio(
+    voiceover_id: str,
+    user_id: str = Depends(verify_token)
+):
+    """Playable URL for one voiceover: a signed Storage URL, or the inline data URL of legacy rows"""
+    try:
+        supabase = get_supabase()
+        
+        # Verify voiceover ownership through script -> project relationship
+        voiceover_query = (
+            supabase.table('voiceovers')
+            .select('id, audio_storage_path, audio_data_url, status, scripts!inner(projects!inner(user_id))')
+            .eq('id', voiceover_id)
+            .limit(1)
+        )
+        voiceover_result = await asyncio.to_thread(voiceover_query.execute)
+        if not voiceover_result.data:
+            raise HTTPException(status_code=404, detail="Voiceover not found")
+        voiceover = voiceover_result.data[0]
+        if voiceover['scripts']['projects']['user_id'] != user_id:
+            raise HTTPException(status_code=403, detail="Access denied")
+        if voiceover.get('status') != 'complete':
+            raise HTTPException(status_code=409, detail="Voiceover not ready")
+        
+        path = voiceover.get('audio_storage_path')
+        if path:
+            audio_url = await asyncio.to_thread(_signed_audio_url, supabase, path)
+        else:
+            audio_url = voiceover.get('audio_data_url')
+        if not audio_url:
+            raise HTTPException(status_code=404, detail="Voiceover has no audio")
+        
+        return {"success": True, "voiceover_id": voiceover_id, "audio_url": audio_url}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch voiceover audio: {str(e)}")
+
+@router.get("/stream/{voiceover_id}")
+async def stream_voiceover(
+    voiceover_id: str,
+    range_header: Optional[str] = Header(None, alias='Range'),
+    user_id: str = Depends(verify_token)
+):
+    """Stream a voiceover's WAV from Storage in chunks, without buffering it in the API.
+    
+    A `Range` header is forwarded to Storage, so players can seek and load progressively.
+    """
+    try:
+        supabase = get_supabase()
+        
+        # Verify voiceover ownership through script -> project relationship
+        voiceover_query = (
+            supabase.table('voiceovers')
+            .select('id, audio_storage_path, status, scripts!inner(projects!inner(user_id))')
+            .eq('id', voiceover_id)
+            .limit(1)
+        )
+        voiceover_result = await asyncio.to_thread(voiceover_query.execute)
+        if not voiceover_result.data:
+            raise HTTPException(status_code=404, detail="Voiceover not found")
+        voiceover = voiceover_result.data[0]
+        if voiceover['scripts']['projects']['user_id'] != user_id:
+            raise HTTPException(status_code=403, detail="Access denied")
+        if voiceover.get('status') != 'complete':
+            raise HTTPException(status_code=409, detail="Voiceover not ready")
+        
+        path = voiceover.get('audio_storage_path')
+        if not path:
+            raise HTTPException(status_code=404, detail="Voiceover has no stored audio")
+        
+        url = await asyncio.to_thread(_signed_audio_url, supabase, path)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch voiceover: {str(e)}")
+    
+    request_headers = {'Range': range_header} if range_header else {}
+    client = httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0))
+    try:
+        resp = await client.send(client.build_request('GET', url, headers=request_headers), stream=True)
+    except httpx.HTTPError as e:
+        await client.aclose()
+        raise HTTPException(status_code=502, detail=f"Storage request failed: {str(e)}")
+    if resp.status_code not in (200, 206):
+        await resp.aclose()
+        await client.aclose()
+        raise HTTPException(status_code=502, detail=f"Storage returned {resp.status_code}")
+    
+    async def body():
+        try:
+            async for chunk in resp.aiter_bytes(AUDIO_STREAM_CHUNK):
+                yield chunk
+        finally:
+            await resp.aclose()
+            await client.aclose()
+    
+    headers = {}
+    for name in ('content-length', 'content-range', 'accept-ranges'):
+        if resp.headers.get(name):
+            headers[name] = resp.headers[name]
+    return StreamingResponse(body(), status_code=resp.status_code, media_type='audio/wav', headers=headers)
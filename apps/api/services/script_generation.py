@@ -1,8 +1,18 @@
 """AI service for script generation with configurable model providers."""
 
+import asyncio
+import hashlib
+import json
+import logging
 import os
+import random
 import re
-from typing import Optional, Literal
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import AsyncIterator, Optional, Literal
 
 # Load environment variables from .env file
 try:
@@ -19,15 +29,164 @@ try:
 except ImportError:  # pragma: no cover - httpx should be installed via requirements
     httpx = None
 
+try:
+    from google import generativeai as genai
+except ImportError:  # Gemini provider is optional
+    genai = None
+
+logger = logging.getLogger(__name__)
+
+# Shared client so LLM calls reuse pooled keep-alive connections instead of
+# a fresh TCP+TLS handshake per request; closed on app shutdown
+_http_client = None
+
+GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+# Characters of streamed output to hold back while waiting for "Scene 1"
+STREAM_INTRO_LOOKAHEAD = 1000
+
+# Rate limits and transient upstream errors are retried with backoff before
+# falling back to the next provider; repeated failures open a circuit that
+# skips Groq entirely for a while
+GROQ_MAX_RETRIES = 3
+GROQ_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+GROQ_CIRCUIT_THRESHOLD = 5
+GROQ_CIRCUIT_WINDOW = 60.0
+GROQ_CIRCUIT_COOLDOWN = 30.0
+_groq_circuit = {'failures': 0, 'window_start': 0.0, 'open_until': 0.0}
+
+
+class GroqAPIError(Exception):
+    """Error response from the Groq API."""
+
+    def __init__(self, status_code: int, detail):
+        super().__init__(f"Groq API error {status_code}: {detail}")
+        self.status_code = status_code
+
+
+# Scene markers and trailing meta-commentary, used to clean up model output
+_SCENE1_RE = re.compile(r'Scene\s+1[\s:]', re.IGNORECASE)
+_SCENE_HEADER_RE = re.compile(r'Scene\s+\d+[\s:]', re.IGNORECASE)
+_TRAILING_NOTE_RES = [
+    re.compile(pattern, re.IGNORECASE | re.DOTALL)
+    for pattern in (
+        r'\n\s*Note:.*$',
+        r'\n\s*I\'ve written.*$',
+        r'\n\s*according to.*$',
+        r'\n\s*This script.*$',
+    )
+]
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+
+# Generated scripts are cached by prompt + sampling settings in the llm_cache
+# table; entries older than this are ignored and regenerated
+LLM_CACHE_TTL = timedelta(days=int(os.getenv('LLM_CACHE_TTL_DAYS', '7')))
+SCRIPT_CACHE_ENABLED = os.getenv('SCRIPT_CACHE_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+# Hot entries are also kept in process (LRU, short TTL) to skip the database round trip
+MEMORY_CACHE_SIZE = 128
+MEMORY_CACHE_TTL = 3600.0
+_memory_cache: 'OrderedDict[str, tuple[float, str]]' = OrderedDict()
+
+# cache key -> task generating that script, for coalescing concurrent duplicates
+_inflight_scripts: dict[str, asyncio.Task] = {}
+
+
+# Property-independent part of the photo-grounded listing prompt. It leads the
+# prompt byte-for-byte identically on every request so provider-side prompt
+# caching can reuse it; all per-property data is appended after it.
+_PHOTO_LISTING_PROMPT_PREFIX = """You are a South African real-estate video scriptwriter. Generate a COMPLETE property listing video script with one scene for EVERY photo listed under PHOTOS PROVIDED, all in one response.
+
+**OUTPUT FORMAT - Generate ALL scenes immediately (NO Visuals line, NO notes at the end):**
+
+Scene 1 (0:00-0:30): [Title based on Photo 1's scene_type and caption]
+**Content/Narration:** [2-4 sentences describing the PROPERTY STRUCTURE and PERMANENT FEATURES visible in Photo 1. Reference specific architectural details, finishes, or permanent fixtures from the caption. Start with "Welcome to" and the property address. DO NOT mention furniture, decor, or temporary items.]
+
+Scene 2 (0:30-1:00): [Title based on Photo 2's scene_type and caption]
+**Content/Narration:** [2-4 sentences describing the PROPERTY STRUCTURE and PERMANENT FEATURES visible in Photo 2. Reference specific architectural details, finishes, or permanent fixtures from the caption. DO NOT mention furniture, decor, or temporary items.]
+
+Scene 3 (1:00-1:30): [Title based on Photo 3's scene_type and caption]
+**Content/Narration:** [2-4 sentences describing the PROPERTY STRUCTURE and PERMANENT FEATURES visible in Photo 3. Reference specific architectural details, finishes, or permanent fixtures from the caption. DO NOT mention furniture, decor, or temporary items.]
 
-PLACEHOLDER_KEYS = {
+[Continue for ALL photos - do not stop until you have written the scene for the last photo]
+
+**CRITICAL RULES:**
+1. Generate ALL scenes in ONE response. Do NOT stop after Scene 1.
+2. Do NOT ask questions, wait for confirmation, or say "let me know when to proceed".
+3. Use the property address in Scene 1 only (e.g., "Welcome to" followed by the address).
+4. **FORBIDDEN - DO NOT INCLUDE OR MENTION:**
+   - "Visuals:" line (photos are already provided, no need to describe them)
+   - Any notes, meta-commentary, or explanations at the end (e.g., "Note: I've written...")
+   - **Furniture** (couches, sofas, chairs, tables, beds, mattresses, desks, etc.)
+   - **Electronics** (televisions, TVs, flat screen TVs, computers, monitors, speakers, etc.)
+   - **Appliances** (microwaves, ovens, refrigerators, dishwashers, washing machines, etc.) - UNLESS they are built-in permanent fixtures
+   - **Decor items** (pictures, paintings, vases, rugs, curtains, blinds, etc.)
+   - **Temporary items** (personal belongings, clothing, books, plants, etc.)
+   - **Features NOT in the property details** (e.g., if balcony is not listed, DO NOT mention it)
+   - **ANYTHING that can be moved or removed** - only describe permanent, built-in features
+5. **ONLY MENTION:**
+   - Property structure (rooms, layout, size, ceiling height, windows, doors)
+   - Permanent fixtures (built-in cabinets, countertops, sinks, bathtubs, showers, lighting fixtures)
+   - Architectural features (exposed beams, archways, built-in storage)
+   - Finishes (flooring type, wall finishes, tile work)
+   - Features from property details IF they appear in the photo (e.g., if "balcony" is in property features AND visible in photo)
+6. Each scene MUST reference specific details from that photo's caption about STRUCTURE/FINISHES only.
+7. Do NOT invent rooms, features, or amenities not in the photo captions OR property details.
+8. Use professional South African real-estate language (Rands, m², suburbs, estates, complexes).
+9. **END CLEANLY**: After the last scene, stop immediately. Do NOT add any notes, explanations, or meta-commentary.
+
+**EXAMPLE OF WHAT TO DESCRIBE:**
+- "This spacious living room features high ceilings, large windows that flood the space with natural light, and elegant tile flooring."
+- "The modern kitchen boasts sleek countertops, built-in cabinetry, and a functional layout perfect for cooking."
+- "The bathroom features a large mirror, modern fixtures, and quality tiling throughout."
+
+**EXAMPLE OF WHAT NOT TO DESCRIBE:**
+- "The plush couch invites you to relax" ❌ (furniture - can be moved)
+- "The large television provides entertainment" ❌ (electronics - can be removed)
+- "featuring a flat screen TV" ❌ (electronics - temporary item)
+- "The microwave and microwave oven" ❌ (appliances - can be moved)
+- "A beautiful balcony with stunning views" ❌ (if balcony not in property details)
+- "The elegant curtains frame the windows" ❌ (decor - can be removed)
+
+**REMEMBER: When selling a property, buyers are purchasing the STRUCTURE and PERMANENT FEATURES, not the furniture or temporary items. Focus ONLY on what stays with the property.**
+
+"""
+
+
+def _canonical_prompt(text: str) -> str:
+    """Strip trailing spaces and collapse runs of blank lines so equal inputs give byte-identical prompts."""
+    text = "\n".join(line.rstrip() for line in text.split("\n"))
+    return _BLANK_LINES_RE.sub("\n\n", text)
+
+
+PLACEHOLDER_KEYS = frozenset({
     '',
     'your_api_key_here',
     'YOUR_KEY_HERE',
     'your-openai-api-key',
     'your-anthropic-api-key',
     'your-gemini-key',
-}
+})
+
+
+def _configured_key(*env_names: str) -> Optional[str]:
+    """First of `env_names` holding a real key (not unset or a placeholder)."""
+    for name in env_names:
+        key = os.getenv(name)
+        if key and key not in PLACEHOLDER_KEYS:
+            return key
+    return None
+
+
+# Provider keys and default models are resolved once; .env is loaded above
+GROQ_API_KEY = _configured_key('GROQ_API_KEY')
+GEMINI_API_KEY = _configured_key('GEMINI_API_KEY', 'GOOGLE_API_KEY')
+OPENAI_API_KEY = _configured_key('OPENAI_API_KEY')
+ANTHROPIC_API_KEY = _configured_key('ANTHROPIC_API_KEY')
+GROQ_MODEL = os.getenv('GROQ_MODEL', 'llama-3.1-8b-instant')
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
+OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
+ANTHROPIC_MODEL = os.getenv('ANTHROPIC_MODEL', 'claude-3-5-haiku-latest')
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1').rstrip('/')
 
 
 async def generate_script_with_gemini(
@@ -55,9 +214,13 @@ async def generate_script_with_gemini(
     model_name: Optional[str] = None,
     # Photo-grounding
     photos: Optional[list[dict]] = None,
+    use_cache: bool = True,
 ) -> str:
     """
     Generate script content using the requested provider/model.
+    
+    Identical requests (same prompt, provider, model and sampling settings)
+    are served from the llm_cache table unless `use_cache` is False.
     """
     prompt = build_prompt(
         topic=topic,
@@ -83,20 +246,36 @@ async def generate_script_with_gemini(
     )
     
     provider = (model_provider or 'auto').lower()
-    max_tokens = _estimate_max_tokens(word_count, mode, image_count)
+    scene_count = _scene_count(image_count, photos, video_type, property_address, property_type)
+    max_tokens = _estimate_max_tokens(word_count, mode, scene_count)
+    stop = _stop_after_scene(mode, scene_count)
+
+    cache_key = _llm_cache_key(prompt, provider, model_name, temperature, max_tokens)
+    use_cache = use_cache and SCRIPT_CACHE_ENABLED
+    if use_cache:
+        cached = await _lookup_cached_script(cache_key)
+        if cached:
+            return cached
 
     async def run_provider(name: str) -> Optional[str]:
         if name == 'groq':
-            api_key = os.getenv('GROQ_API_KEY')
-            if not api_key or api_key in PLACEHOLDER_KEYS:
+            if not GROQ_API_KEY or not _groq_available():
                 return None
-            return await _generate_with_groq(
-                api_key=api_key,
-                prompt=prompt,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                model_name=model_name,
-            )
+            try:
+                text = await _generate_with_groq(
+                    api_key=GROQ_API_KEY,
+                    prompt=prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    model_name=model_name,
+                    stop=stop,
+                )
+            except Exception as e:
+                if _is_groq_outage(e):
+                    _record_groq_result(False)
+                raise
+            _record_groq_result(True)
+            return text
 
         if name == 'gemini':
             return await _generate_with_gemini_sdk(
@@ -106,11 +285,10 @@ async def generate_script_with_gemini(
             )
 
         if name == 'openai':
-            api_key = os.getenv('OPENAI_API_KEY')
-            if not api_key or api_key in PLACEHOLDER_KEYS:
+            if not OPENAI_API_KEY:
                 return None
             return await _generate_with_openai(
-                api_key=api_key,
+                api_key=OPENAI_API_KEY,
                 prompt=prompt,
                 temperature=temperature,
                 max_tokens=max_tokens,
@@ -118,11 +296,10 @@ async def generate_script_with_gemini(
             )
 
         if name == 'anthropic':
-            api_key = os.getenv('ANTHROPIC_API_KEY')
-            if not api_key or api_key in PLACEHOLDER_KEYS:
+            if not ANTHROPIC_API_KEY:
                 return None
             return await _generate_with_anthropic(
-                api_key=api_key,
+                api_key=ANTHROPIC_API_KEY,
                 prompt=prompt,
                 temperature=temperature,
                 max_tokens=max_tokens,
@@ -131,26 +308,245 @@ async def generate_script_with_gemini(
 
         return None
 
-    try_order = ['groq', 'gemini', 'openai', 'anthropic'] if provider == 'auto' else [provider]
+    async def generate() -> str:
+        try_order = ['groq', 'gemini', 'openai', 'anthropic'] if provider == 'auto' else [provider]
+
+        for provider_name in try_order:
+            try:
+                text = await run_provider(provider_name)
+                if text:
+                    script = _strip_intro_to_first_scene(text)
+                    if SCRIPT_CACHE_ENABLED:
+                        await _cache_script(cache_key, script)
+                    return script
+            except Exception as e:
+                if provider != 'auto':
+                    raise Exception(f'{provider_name} generation failed: {e}') from e
+                logger.warning('%s generation error: %s', provider_name, e)
+
+        if provider != 'auto':
+            raise Exception(
+                f'No API key configured for provider "{provider}" or request failed. '
+                'Set the corresponding environment variable and retry.'
+            )
+
+        # Last resort for local development
+        return generate_mock_script(topic, image_count, mode)
+
+    # Concurrent identical requests (double-clicked "regenerate", several tabs)
+    # share one upstream call instead of each paying for the full completion
+    task = _inflight_scripts.get(cache_key)
+    if task is None:
+        task = asyncio.ensure_future(generate())
+        _inflight_scripts[cache_key] = task
+        task.add_done_callback(lambda _: _inflight_scripts.pop(cache_key, None))
+    else:
+        logger.info('Joining in-flight generation: %s', cache_key[:12])
+    # Shielded so one caller disconnecting doesn't cancel the others' result
+    return await asyncio.shield(task)
+
+
+async def stream_script(
+    topic: str,
+    mode: Literal['script', 'outline', 'rewrite'] = 'script',
+    temperature: float = 0.7,
+    word_count: int = 500,
+    image_count: int = 10,
+    model_provider: Optional[str] = 'auto',
+    model_name: Optional[str] = None,
+    use_cache: bool = True,
+    **prompt_options,
+) -> AsyncIterator[tuple[str, str]]:
+    """
+    Streaming variant of `generate_script_with_gemini`.
+    
+    Yields ('delta', text) events while Groq generates, then a single
+    ('done', script) with the cleaned-up script. Cache hits and other
+    providers skip straight to 'done'. `prompt_options` are the remaining
+    `build_prompt` arguments (style, real estate fields, photos, ...).
+    """
+    provider = (model_provider or 'auto').lower()
+    
+    async def generate_in_one_go() -> str:
+        return await generate_script_with_gemini(
+            topic=topic,
+            mode=mode,
+            temperature=temperature,
+            word_count=word_count,
+            image_count=image_count,
+            model_provider=model_provider,
+            model_name=model_name,
+            use_cache=use_cache,
+            **prompt_options,
+        )
+    
+    if provider not in ('auto', 'groq') or not GROQ_API_KEY or not _groq_available():
+        yield 'done', await generate_in_one_go()
+        return
+    
+    prompt = build_prompt(
+        topic=topic,
+        mode=mode,
+        image_count=image_count,
+        word_count=word_count,
+        **prompt_options,
+    )
+    scene_count = _scene_count(
+        image_count,
+        prompt_options.get('photos'),
+        prompt_options.get('video_type'),
+        prompt_options.get('property_address'),
+        prompt_options.get('property_type'),
+    )
+    max_tokens = _estimate_max_tokens(word_count, mode, scene_count)
+    
+    cache_key = _llm_cache_key(prompt, provider, model_name, temperature, max_tokens)
+    if use_cache and SCRIPT_CACHE_ENABLED:
+        cached = await _lookup_cached_script(cache_key)
+        if cached:
+            yield 'done', cached
+            return
+    
+    parts: list[str] = []
+    # Chatter before "Scene 1" is dropped by the final cleanup, so hold the
+    # start of the stream back until Scene 1 begins (or the lookahead runs out)
+    pending = ''
+    started = False
+    try:
+        async for delta in _stream_groq(
+            api_key=GROQ_API_KEY,
+            prompt=prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            model_name=model_name,
+            stop=_stop_after_scene(mode, scene_count),
+        ):
+            parts.append(delta)
+            if started:
+                yield 'delta', delta
+                continue
+            pending += delta
+            match = _SCENE1_RE.search(pending)
+            if match or len(pending) > STREAM_INTRO_LOOKAHEAD:
+                started = True
+                yield 'delta', pending[match.start():] if match else pending
+        if not parts:
+            raise Exception("Groq API returned empty content")
+        if not started:
+            started = True
+            yield 'delta', pending
+    except Exception as e:
+        if _is_groq_outage(e):
+            _record_groq_result(False)
+        # Once text has reached the caller there is nothing sensible to fall back to
+        if started or provider != 'auto':
+            raise Exception(f'groq generation failed: {e}') from e
+        logger.warning('groq generation error: %s', e)
+        yield 'done', await generate_in_one_go()
+        return
+    
+    _record_groq_result(True)
+    script = _strip_intro_to_first_scene(''.join(parts))
+    if SCRIPT_CACHE_ENABLED:
+        await _cache_script(cache_key, script)
+    yield 'done', script
+
+
+def _llm_cache_key(
+    prompt: str,
+    provider: str,
+    model_name: Optional[str],
+    temperature: float,
+    max_tokens: int,
+) -> str:
+    # Temperatures are bucketed to 0.1 so 0.7 and 0.70000001 share an entry
+    return hashlib.sha256(
+        f"{provider}|{model_name or ''}|{round(temperature, 1)}|{max_tokens}|{prompt}".encode('utf-8')
+    ).hexdigest()
+
+
+async def _lookup_cached_script(key: str) -> Optional[str]:
+    """Cached script for `key` from the in-process LRU, falling back to llm_cache."""
+    entry = _memory_cache.get(key)
+    if entry and time.monotonic() - entry[0] < MEMORY_CACHE_TTL:
+        _memory_cache.move_to_end(key)
+        logger.info('LLM cache hit (memory): %s', key[:12])
+        return entry[1]
+    
+    cached = await asyncio.to_thread(_get_cached_response, key)
+    if cached:
+        logger.info('LLM cache hit: %s', key[:12])
+        _remember_script(key, cached)
+    return cached
+
+
+async def _cache_script(key: str, script: str) -> None:
+    _remember_script(key, script)
+    await asyncio.to_thread(_store_cached_response, key, script)
+
+
+def _remember_script(key: str, script: str) -> None:
+    _memory_cache[key] = (time.monotonic(), script)
+    _memory_cache.move_to_end(key)
+    while len(_memory_cache) > MEMORY_CACHE_SIZE:
+        _memory_cache.popitem(last=False)
+
+
+def _get_cached_response(key: str) -> Optional[str]:
+    """Cached script for `key` if present and fresh; cache errors count as a miss."""
+    try:
+        from db.client import get_supabase
+        cutoff = (datetime.now(timezone.utc) - LLM_CACHE_TTL).isoformat()
+        result = (
+            get_supabase().table('llm_cache')
+            .select('response')
+            .eq('key', key)
+            .gte('created_at', cutoff)
+            .limit(1)
+            .execute()
+        )
+    except Exception as e:
+        logger.warning('LLM cache lookup failed: %s', e)
+        return None
+    return result.data[0]['response'] if result.data else None
+
 
-    for provider_name in try_order:
+def _store_cached_response(key: str, response: str) -> None:
+    """Best-effort cache write; a stale entry for the same key is replaced."""
+    try:
+        from db.client import get_supabase
+        get_supabase().table('llm_cache').upsert({
+            'key': key,
+            'response': response,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+        }, on_conflict='key').execute()
+    except Exception as e:
+        logger.warning('LLM cache write failed: %s', e)
+
+
+def _get_http_client():
+    """Lazily create the shared AsyncClient used by the LLM providers."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
         try:
-            text = await run_provider(provider_name)
-            if text:
-                return _strip_intro_to_first_scene(text)
-        except Exception as e:
-            if provider != 'auto':
-                raise Exception(f'{provider_name} generation failed: {e}') from e
-            print(f'{provider_name} generation error: {e}')
-
-    if provider != 'auto':
-        raise Exception(
-            f'No API key configured for provider "{provider}" or request failed. '
-            'Set the corresponding environment variable and retry.'
+            import h2  # noqa: F401 - installed by httpx[http2]; multiplexes concurrent calls
+            http2 = True
+        except ImportError:
+            http2 = False
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            http2=http2,
         )
+    return _http_client
+
 
-    # Last resort for local development
-    return generate_mock_script(topic, image_count, mode)
+async def close_http_client() -> None:
+    """Close the shared LLM client; called from the app shutdown hook."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
 
 async def _generate_with_groq(
@@ -159,15 +555,147 @@ async def _generate_with_groq(
     temperature: float,
     max_tokens: int,
     model_name: Optional[str] = None,
+    stop: Optional[list[str]] = None,
 ) -> str:
     """Call Groq's chat completion endpoint (free tier, no credit card required)."""
     if httpx is None:
         raise Exception("httpx is not installed; cannot call Groq API.")
     
-    # Groq offers free LLaMA models - using LLaMA 3.1 8B which is fast and free
-    groq_model = model_name or os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
-    api_url = "https://api.groq.com/openai/v1/chat/completions"
+    payload = _groq_payload(prompt, temperature, max_tokens, model_name, stop)
+    client = _get_http_client()
+    for attempt in range(GROQ_MAX_RETRIES + 1):
+        try:
+            response = await client.post(
+                GROQ_API_URL,
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json"
+                },
+                json=payload
+            )
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            # Only connection setup is retried; a read timeout already waited a full minute
+            if attempt == GROQ_MAX_RETRIES:
+                raise
+            await asyncio.sleep(_groq_backoff(attempt))
+            continue
+        if response.status_code not in GROQ_RETRY_STATUSES or attempt == GROQ_MAX_RETRIES:
+            break
+        delay = _groq_backoff(attempt, response.headers.get("retry-after"))
+        logger.info("Groq returned %s; retrying in %.1fs", response.status_code, delay)
+        await asyncio.sleep(delay)
     
+    if response.status_code >= 400:
+        try:
+            detail = response.json()
+        except Exception:
+            detail = response.text
+        raise GroqAPIError(response.status_code, detail)
+    
+    data = response.json()
+    choices = data.get("choices", [])
+    if not choices:
+        raise Exception("Groq API returned no choices")
+    
+    message = choices[0].get("message") or {}
+    content = message.get("content", "")
+    
+    if not content:
+        raise Exception("Groq API returned empty content")
+    
+    return content
+
+
+def _groq_backoff(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retry `attempt + 1`: Retry-After if given, else jittered exponential."""
+    if retry_after:
+        try:
+            return min(float(retry_after), 5.0)
+        except ValueError:
+            pass
+    return min(2 ** attempt + random.random() * 0.5, 8.0)
+
+
+def _groq_available() -> bool:
+    """False while the Groq circuit is open after repeated failures."""
+    return time.monotonic() >= _groq_circuit['open_until']
+
+
+def _is_groq_outage(exc: Exception) -> bool:
+    """Whether `exc` is the kind of failure the circuit guards against.
+
+    Connection problems and the retryable statuses count; request errors such
+    as a bad model name (400) or key (401/403) are the caller's, not Groq's.
+    """
+    if isinstance(exc, GroqAPIError):
+        return exc.status_code in GROQ_RETRY_STATUSES
+    return httpx is not None and isinstance(exc, (httpx.ConnectError, httpx.TimeoutException))
+
+
+def _record_groq_result(ok: bool) -> None:
+    if ok:
+        _groq_circuit['failures'] = 0
+        return
+    now = time.monotonic()
+    if now - _groq_circuit['window_start'] > GROQ_CIRCUIT_WINDOW:
+        _groq_circuit['failures'] = 0
+        _groq_circuit['window_start'] = now
+    _groq_circuit['failures'] += 1
+    if _groq_circuit['failures'] >= GROQ_CIRCUIT_THRESHOLD:
+        _groq_circuit['failures'] = 0
+        _groq_circuit['open_until'] = now + GROQ_CIRCUIT_COOLDOWN
+        logger.warning('Groq failed %s times; skipping it for %.0fs', GROQ_CIRCUIT_THRESHOLD, GROQ_CIRCUIT_COOLDOWN)
+
+
+async def _stream_groq(
+    api_key: str,
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+    model_name: Optional[str] = None,
+    stop: Optional[list[str]] = None,
+) -> AsyncIterator[str]:
+    """Yield content deltas from Groq's OpenAI-compatible SSE stream as they arrive."""
+    if httpx is None:
+        raise Exception("httpx is not installed; cannot call Groq API.")
+    
+    payload = _groq_payload(prompt, temperature, max_tokens, model_name, stop)
+    payload["stream"] = True
+    client = _get_http_client()
+    async with client.stream(
+        "POST",
+        GROQ_API_URL,
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        },
+        json=payload
+    ) as response:
+        if response.status_code >= 400:
+            detail = (await response.aread()).decode("utf-8", "replace")
+            raise GroqAPIError(response.status_code, detail)
+        
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            choices = json.loads(data).get("choices") or []
+            delta = (choices[0].get("delta") or {}).get("content") if choices else None
+            if delta:
+                yield delta
+
+
+def _groq_payload(
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+    model_name: Optional[str],
+    stop: Optional[list[str]] = None,
+) -> dict:
+    # Groq offers free LLaMA models - using LLaMA 3.1 8B which is fast and free
+    groq_model = model_name or GROQ_MODEL
     payload = {
         "model": groq_model,
         "temperature": float(max(0.0, min(1.0, temperature))),
@@ -183,37 +711,9 @@ async def _generate_with_groq(
             {"role": "user", "content": prompt}
         ]
     }
-    
-    timeout = httpx.Timeout(60.0, connect=10.0)
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        response = await client.post(
-            api_url,
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            },
-            json=payload
-        )
-        
-        if response.status_code >= 400:
-            try:
-                detail = response.json()
-            except Exception:
-                detail = response.text
-            raise Exception(f"Groq API error {response.status_code}: {detail}")
-        
-        data = response.json()
-        choices = data.get("choices", [])
-        if not choices:
-            raise Exception("Groq API returned no choices")
-        
-        message = choices[0].get("message") or {}
-        content = message.get("content", "")
-        
-        if not content:
-            raise Exception("Groq API returned empty content")
-        
-        return content
+    if stop:
+        payload["stop"] = stop
+    return payload
 
 
 async def _generate_with_gemini_sdk(
@@ -222,29 +722,34 @@ async def _generate_with_gemini_sdk(
     model_name: Optional[str] = None,
 ) -> Optional[str]:
     """Use Google Gemini SDK if configured."""
-    api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
-    if not api_key or api_key in PLACEHOLDER_KEYS:
+    if genai is None:
         return None
-    
-    try:
-        from google import generativeai as genai
-    except ImportError:
+    if not GEMINI_API_KEY:
         return None
     
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel(
-        model_name=model_name or os.getenv('GEMINI_MODEL', 'gemini-1.5-flash'),
-        system_instruction="You are a professional YouTube scriptwriter and video director. Your task is to create engaging, visual, and well-structured content.",
+    model = _get_gemini_model(GEMINI_API_KEY, model_name or GEMINI_MODEL)
+    
+    # Async call: the sync one would block the event loop for the whole generation
+    response = await model.generate_content_async(
+        prompt,
         generation_config={
             "temperature": float(max(0.0, min(1.0, temperature))),
             "max_output_tokens": 8192,
         }
     )
-    
-    response = model.generate_content(prompt)
     return getattr(response, "text", None)
 
 
+@lru_cache(maxsize=8)
+def _get_gemini_model(api_key: str, model_name: str):
+    """Configure the Gemini SDK and build the model once per (key, model)."""
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(
+        model_name=model_name,
+        system_instruction="You are a professional YouTube scriptwriter and video director. Your task is to create engaging, visual, and well-structured content.",
+    )
+
+
 async def _generate_with_openai(
     api_key: str,
     prompt: str,
@@ -256,9 +761,9 @@ async def _generate_with_openai(
     if httpx is None:
         raise Exception("httpx is not installed; cannot call OpenAI API.")
 
-    api_base = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+    api_base = OPENAI_BASE_URL
     api_url = f"{api_base}/chat/completions"
-    model = model_name or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    model = model_name or OPENAI_MODEL
 
     payload = {
         "model": model,
@@ -276,39 +781,38 @@ async def _generate_with_openai(
         ],
     }
 
-    timeout = httpx.Timeout(60.0, connect=10.0)
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        response = await client.post(
-            api_url,
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json=payload,
-        )
+    client = _get_http_client()
+    response = await client.post(
+        api_url,
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        },
+        json=payload,
+    )
 
-        if response.status_code >= 400:
-            try:
-                detail = response.json()
-            except Exception:
-                detail = response.text
-            raise Exception(f"OpenAI API error {response.status_code}: {detail}")
-
-        data = response.json()
-        choices = data.get("choices", [])
-        if not choices:
-            raise Exception("OpenAI API returned no choices")
-
-        message = choices[0].get("message") or {}
-        content = message.get("content")
-        if isinstance(content, str):
-            return content
-        if isinstance(content, list):
-            texts = [part.get("text", "") for part in content if isinstance(part, dict)]
-            merged = "\n".join([t for t in texts if t]).strip()
-            if merged:
-                return merged
-        raise Exception("OpenAI API returned empty content")
+    if response.status_code >= 400:
+        try:
+            detail = response.json()
+        except Exception:
+            detail = response.text
+        raise Exception(f"OpenAI API error {response.status_code}: {detail}")
+
+    data = response.json()
+    choices = data.get("choices", [])
+    if not choices:
+        raise Exception("OpenAI API returned no choices")
+
+    message = choices[0].get("message") or {}
+    content = message.get("content")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        texts = [part.get("text", "") for part in content if isinstance(part, dict)]
+        merged = "\n".join([t for t in texts if t]).strip()
+        if merged:
+            return merged
+    raise Exception("OpenAI API returned empty content")
 
 
 async def _generate_with_anthropic(
@@ -323,7 +827,7 @@ async def _generate_with_anthropic(
         raise Exception("httpx is not installed; cannot call Anthropic API.")
 
     api_url = "https://api.anthropic.com/v1/messages"
-    model = model_name or os.getenv("ANTHROPIC_MODEL", "claude-3-5-haiku-latest")
+    model = model_name or ANTHROPIC_MODEL
 
     payload = {
         "model": model,
@@ -336,32 +840,64 @@ async def _generate_with_anthropic(
         "messages": [{"role": "user", "content": prompt}],
     }
 
-    timeout = httpx.Timeout(60.0, connect=10.0)
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        response = await client.post(
-            api_url,
-            headers={
-                "x-api-key": api_key,
-                "anthropic-version": "2023-06-01",
-                "content-type": "application/json",
-            },
-            json=payload,
-        )
-
-        if response.status_code >= 400:
-            try:
-                detail = response.json()
-            except Exception:
-                detail = response.text
-            raise Exception(f"Anthropic API error {response.status_code}: {detail}")
+    client = _get_http_client()
+    response = await client.post(
+        api_url,
+        headers={
+            "x-api-key": api_key,
+            "anthropic-version": "2023-06-01",
+            "content-type": "application/json",
+        },
+        json=payload,
+    )
 
-        data = response.json()
-        content = data.get("content") or []
-        texts = [part.get("text", "") for part in content if isinstance(part, dict)]
-        merged = "\n".join([t for t in texts if t]).strip()
-        if not merged:
-            raise Exception("Anthropic API returned empty content")
-        return merged
+    if response.status_code >= 400:
+        try:
+            detail = response.json()
+        except Exception:
+            detail = response.text
+        raise Exception(f"Anthropic API error {response.status_code}: {detail}")
+
+    data = response.json()
+    content = data.get("content") or []
+    texts = [part.get("text", "") for part in content if isinstance(part, dict)]
+    merged = "\n".join([t for t in texts if t]).strip()
+    if not merged:
+        raise Exception("Anthropic API returned empty content")
+    return merged
+
+
+def _photo_line(idx: int, photo: dict) -> str:
+    """One numbered entry of the PHOTOS PROVIDED block."""
+    scene_type = (photo.get("scene_type") or "scene").replace("_", " ")
+    line = f"{idx}. [{scene_type}] {photo.get('caption') or ''}"
+    features = ", ".join(photo.get("features") or [])
+    if features:
+        line += f" | key features: {features}"
+    return line
+
+
+@dataclass(frozen=True)
+class _PromptContext:
+    """Request fields plus the pieces derived once by `build_prompt`."""
+    topic: str
+    image_count: int
+    word_count: int
+    style_name: Optional[str]
+    selection: Optional[str]
+    video_type: Optional[str]
+    property_address: Optional[str]
+    property_type: Optional[str]
+    property_price: Optional[float]
+    bedrooms: Optional[int]
+    bathrooms: Optional[float]
+    square_feet: Optional[int]
+    mls_number: Optional[str]
+    photos: Optional[list[dict]]
+    per_scene_words: int
+    feature_names: list[str]
+    real_estate_context: str
+    photos_block: str
 
 
 def build_prompt(
@@ -390,6 +926,8 @@ def build_prompt(
     """Build the appropriate prompt based on mode."""
     
     per_scene_words = max(25, round(word_count / max(1, image_count)))
+    # Human-readable feature names, shared by every template below
+    feature_names = [f.replace('_', ' ') for f in property_features] if property_features else []
     
     # Build real estate context string if real estate data is provided
     real_estate_context = ""
@@ -407,11 +945,10 @@ def build_prompt(
                 property_details.append(f"{square_feet:,} square metres")
             if property_price:
                 property_details.append(f"priced at R{property_price:,.0f}")
-            if property_features:
-                features_str = ", ".join([f.replace('_', ' ') for f in property_features])
-                property_details.append(f"featuring {features_str}")
+            if feature_names:
+                property_details.append(f"featuring {', '.join(feature_names)}")
             
-            real_estate_context = f"\n\n**PROPERTY DETAILS:**\n" + "\n".join([f"- {detail}" for detail in property_details])
+            real_estate_context = "\n\n**PROPERTY DETAILS:**\n" + "\n".join(f"- {detail}" for detail in property_details)
             if mls_number:
                 real_estate_context += f"\n- MLS Number: {mls_number}"
         
@@ -430,26 +967,61 @@ def build_prompt(
     # Build a human-readable list of analysed photos for photo-grounded scripts
     photos_block = ""
     if photos:
-        photo_lines = []
-        for idx, p in enumerate(photos, start=1):
-            scene_type = (p.get("scene_type") or "scene").replace("_", " ")
-            caption = p.get("caption") or ""
-            features_list = p.get("features") or []
-            features = ", ".join(features_list)
-            line = f"{idx}. [{scene_type}] {caption}"
-            if features:
-                line += f" | key features: {features}"
-            photo_lines.append(line)
-        photos_block = "\n".join(photo_lines)
-        # Debug logging
-        print(f"[SCRIPT_PROMPT] Using {len(photos)} photos for grounding:")
-        for idx, p in enumerate(photos[:3], start=1):  # Log first 3
-            print(f"  Photo {idx}: scene_type={p.get('scene_type')}, caption={p.get('caption')[:50]}...")
-        if len(photos) > 3:
-            print(f"  ... and {len(photos) - 3} more photos")
+        photos_block = "\n".join(_photo_line(idx, p) for idx, p in enumerate(photos, start=1))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[SCRIPT_PROMPT] Using %s photos for grounding:", len(photos))
+            for idx, p in enumerate(photos[:3], start=1):  # Log first 3
+                logger.debug("  Photo %s: scene_type=%s, caption=%s...", idx, p.get('scene_type'), (p.get('caption') or '')[:50])
+            if len(photos) > 3:
+                logger.debug("  ... and %s more photos", len(photos) - 3)
     
     if mode == 'outline':
-        prompt = f"""Generate a structured outline for a YouTube video titled: "{topic}".
+        builder = _outline_prompt
+    elif mode == 'rewrite' and selection:
+        builder = _rewrite_prompt
+    else:  # 'script' mode (default)
+        builder = _SCRIPT_PROMPT_BUILDERS.get(video_type, _default_script_prompt)
+    prompt = builder(_PromptContext(
+        topic=topic,
+        image_count=image_count,
+        word_count=word_count,
+        style_name=style_name,
+        selection=selection,
+        video_type=video_type,
+        property_address=property_address,
+        property_type=property_type,
+        property_price=property_price,
+        bedrooms=bedrooms,
+        bathrooms=bathrooms,
+        square_feet=square_feet,
+        mls_number=mls_number,
+        photos=photos,
+        per_scene_words=per_scene_words,
+        feature_names=feature_names,
+        real_estate_context=real_estate_context,
+        photos_block=photos_block,
+    ))
+    
+    # Add style
+    if style_name:
+        prompt += f"\n\nUse the style: {style_name}."
+    
+    # Add context
+    if context_mode == 'video' and transcript:
+        prompt += f"\n\nUse this transcript for structure inspiration: {transcript[:500]}..."
+    if context_mode == 'web' and web_data:
+        prompt += f"\n\nUse these facts: {web_data[:500]}..."
+    
+    return prompt
+
+
+def _outline_prompt(ctx: _PromptContext) -> str:
+    """Numbered scene headings for an outline."""
+    topic = ctx.topic
+    image_count = ctx.image_count
+    real_estate_context = ctx.real_estate_context
+    
+    prompt = f"""Generate a structured outline for a YouTube video titled: "{topic}".
 
 **CORE REQUIREMENTS:**
 - Deliver exactly {image_count} distinct scene headings.
@@ -466,8 +1038,16 @@ Return ONLY a numbered list. Do not use markdown. Example:
 **TOPIC:** {topic}
 """
     
-    elif mode == 'rewrite' and selection:
-        prompt = f"""Rewrite the following passage from a YouTube script to improve its clarity, flow, and engagement, while strictly preserving its core meaning and factual content.
+    return prompt
+
+
+def _rewrite_prompt(ctx: _PromptContext) -> str:
+    """Rewrite of the selected passage."""
+    topic = ctx.topic
+    style_name = ctx.style_name
+    selection = ctx.selection
+    
+    prompt = f"""Rewrite the following passage from a YouTube script to improve its clarity, flow, and engagement, while strictly preserving its core meaning and factual content.
 
 **CONTEXT:**
 - Video Title: "{topic}"
@@ -486,62 +1066,67 @@ Return ONLY a numbered list. Do not use markdown. Example:
 **OUTPUT:**
 Return only the rewritten text, without any additional commentary or labels."""
     
-    else:  # 'script' mode (default)
-        # Real estate-specific prompt templates
-        if video_type == 'listing' and (property_address or property_type):
-            # Property listing video script
-            property_desc = []
-            if property_address:
-                property_desc.append(property_address)
-            if property_type:
-                property_desc.append(f"{property_type.replace('_', ' ')}")
-            if bedrooms is not None and bathrooms is not None:
-                property_desc.append(f"{bedrooms}BR/{bathrooms}BA")
-            if property_price:
-                property_desc.append(f"R{property_price:,.0f}")
-            
-            property_summary = " ".join(property_desc)
-            features_list = ", ".join([f.replace('_', ' ') for f in property_features]) if property_features else "modern amenities"
-
-            # If we have analysed photos, ground the script in those photos instead
-            if photos and photos_block:
-                # Build property intro with address - clean it up
-                property_intro = property_address or property_summary or topic
-                if not property_intro or len(property_intro.strip()) < 3:
-                    property_intro = "this property"
-                else:
-                    # Clean up address - remove any trailing duplicates
-                    property_intro = property_intro.strip()
-                    # Remove common duplications like "Street Street" or "Gardens Gardens"
-                    words = property_intro.split()
-                    if len(words) > 1 and words[-1].lower() == words[-2].lower():
-                        property_intro = " ".join(words[:-1])
-                
-                # Calculate time per scene (30 seconds per scene)
-                def get_time_range(scene_num: int, total: int) -> str:
-                    start_sec = (scene_num - 1) * 30
-                    end_sec = scene_num * 30
-                    start_min = start_sec // 60
-                    start_sec_remainder = start_sec % 60
-                    end_min = end_sec // 60
-                    end_sec_remainder = end_sec % 60
-                    return f"{start_min}:{start_sec_remainder:02d}-{end_min}:{end_sec_remainder:02d}"
-                
-                # Build allowed features list from property details
-                allowed_features = []
-                if property_features:
-                    allowed_features.extend([f.replace('_', ' ') for f in property_features])
-                if bedrooms is not None:
-                    allowed_features.append(f"{bedrooms} bedrooms")
-                if bathrooms is not None:
-                    allowed_features.append(f"{bathrooms} bathrooms")
-                if square_feet:
-                    allowed_features.append(f"{square_feet} square metres")
-                allowed_features_str = ", ".join(allowed_features) if allowed_features else "none specified"
-                
-                prompt = f"""You are a South African real-estate video scriptwriter. Generate a COMPLETE property listing video script with ALL {len(photos)} scenes in one response.
-
-**PROPERTY INFORMATION:**
+    return prompt
+
+
+def _listing_prompt(ctx: _PromptContext) -> str:
+    """Property listing script, grounded in the analysed photos when there are any."""
+    if not (ctx.property_address or ctx.property_type):
+        return _default_script_prompt(ctx)
+    topic = ctx.topic
+    image_count = ctx.image_count
+    word_count = ctx.word_count
+    property_address = ctx.property_address
+    property_type = ctx.property_type
+    property_price = ctx.property_price
+    bedrooms = ctx.bedrooms
+    bathrooms = ctx.bathrooms
+    square_feet = ctx.square_feet
+    photos = ctx.photos
+    per_scene_words = ctx.per_scene_words
+    feature_names = ctx.feature_names
+    real_estate_context = ctx.real_estate_context
+    photos_block = ctx.photos_block
+    
+    # Property listing video script
+    property_desc = []
+    if property_address:
+        property_desc.append(property_address)
+    if property_type:
+        property_desc.append(f"{property_type.replace('_', ' ')}")
+    if bedrooms is not None and bathrooms is not None:
+        property_desc.append(f"{bedrooms}BR/{bathrooms}BA")
+    if property_price:
+        property_desc.append(f"R{property_price:,.0f}")
+    
+    property_summary = " ".join(property_desc)
+    features_list = ", ".join(feature_names) or "modern amenities"
+
+    # If we have analysed photos, ground the script in those photos instead
+    if photos and photos_block:
+        # Build property intro with address - clean it up
+        property_intro = property_address or property_summary or topic
+        if not property_intro or len(property_intro.strip()) < 3:
+            property_intro = "this property"
+        else:
+            # Clean up address - remove any trailing duplicates
+            property_intro = property_intro.strip()
+            # Remove common duplications like "Street Street" or "Gardens Gardens"
+            words = property_intro.split()
+            if len(words) > 1 and words[-1].lower() == words[-2].lower():
+                property_intro = " ".join(words[:-1])
+        
+        # Build allowed features list from property details
+        allowed_features = list(feature_names)
+        if bedrooms is not None:
+            allowed_features.append(f"{bedrooms} bedrooms")
+        if bathrooms is not None:
+            allowed_features.append(f"{bathrooms} bathrooms")
+        if square_feet:
+            allowed_features.append(f"{square_feet} square metres")
+        allowed_features_str = ", ".join(allowed_features) if allowed_features else "none specified"
+        
+        dynamic_part = f"""**PROPERTY INFORMATION:**
 Address: {property_intro}
 {real_estate_context}
 
@@ -553,59 +1138,7 @@ Address: {property_intro}
 
 **YOUR TASK:**
 Generate ALL {len(photos)} scenes NOW. Write one scene per photo, in the exact order listed above. Each scene must describe the PROPERTY STRUCTURE and PERMANENT FEATURES visible in that photo.
-
-**OUTPUT FORMAT - Generate ALL scenes immediately (NO Visuals line, NO notes at the end):**
-
-Scene 1 ({get_time_range(1, len(photos))}): [Title based on Photo 1's scene_type and caption]
-**Content/Narration:** [2-4 sentences describing the PROPERTY STRUCTURE and PERMANENT FEATURES visible in Photo 1. Reference specific architectural details, finishes, or permanent fixtures from the caption. Start with "Welcome to {property_intro}" or similar. DO NOT mention furniture, decor, or temporary items.]
-
-Scene 2 ({get_time_range(2, len(photos))}): [Title based on Photo 2's scene_type and caption]
-**Content/Narration:** [2-4 sentences describing the PROPERTY STRUCTURE and PERMANENT FEATURES visible in Photo 2. Reference specific architectural details, finishes, or permanent fixtures from the caption. DO NOT mention furniture, decor, or temporary items.]
-
-Scene 3 ({get_time_range(3, len(photos))}): [Title based on Photo 3's scene_type and caption]
-**Content/Narration:** [2-4 sentences describing the PROPERTY STRUCTURE and PERMANENT FEATURES visible in Photo 3. Reference specific architectural details, finishes, or permanent fixtures from the caption. DO NOT mention furniture, decor, or temporary items.]
-
-[Continue for ALL {len(photos)} scenes - do not stop until you have written Scene {len(photos)}]
-
-**CRITICAL RULES:**
-1. Generate ALL {len(photos)} scenes in ONE response. Do NOT stop after Scene 1.
-2. Do NOT ask questions, wait for confirmation, or say "let me know when to proceed".
-3. Use property address "{property_intro}" in Scene 1 only (e.g., "Welcome to {property_intro}").
-4. **FORBIDDEN - DO NOT INCLUDE OR MENTION:**
-   - "Visuals:" line (photos are already provided, no need to describe them)
-   - Any notes, meta-commentary, or explanations at the end (e.g., "Note: I've written...")
-   - **Furniture** (couches, sofas, chairs, tables, beds, mattresses, desks, etc.)
-   - **Electronics** (televisions, TVs, flat screen TVs, computers, monitors, speakers, etc.)
-   - **Appliances** (microwaves, ovens, refrigerators, dishwashers, washing machines, etc.) - UNLESS they are built-in permanent fixtures
-   - **Decor items** (pictures, paintings, vases, rugs, curtains, blinds, etc.)
-   - **Temporary items** (personal belongings, clothing, books, plants, etc.)
-   - **Features NOT in the property details** (e.g., if balcony is not listed, DO NOT mention it)
-   - **ANYTHING that can be moved or removed** - only describe permanent, built-in features
-5. **ONLY MENTION:**
-   - Property structure (rooms, layout, size, ceiling height, windows, doors)
-   - Permanent fixtures (built-in cabinets, countertops, sinks, bathtubs, showers, lighting fixtures)
-   - Architectural features (exposed beams, archways, built-in storage)
-   - Finishes (flooring type, wall finishes, tile work)
-   - Features from property details IF they appear in the photo (e.g., if "balcony" is in property features AND visible in photo)
-6. Each scene MUST reference specific details from that photo's caption about STRUCTURE/FINISHES only.
-7. Do NOT invent rooms, features, or amenities not in the photo captions OR property details.
-8. Use professional South African real-estate language (Rands, m², suburbs, estates, complexes).
-9. **END CLEANLY**: After Scene {len(photos)}, stop immediately. Do NOT add any notes, explanations, or meta-commentary.
-
-**EXAMPLE OF WHAT TO DESCRIBE:**
-- "This spacious living room features high ceilings, large windows that flood the space with natural light, and elegant tile flooring."
-- "The modern kitchen boasts sleek countertops, built-in cabinetry, and a functional layout perfect for cooking."
-- "The bathroom features a large mirror, modern fixtures, and quality tiling throughout."
-
-**EXAMPLE OF WHAT NOT TO DESCRIBE:**
-- "The plush couch invites you to relax" ❌ (furniture - can be moved)
-- "The large television provides entertainment" ❌ (electronics - can be removed)
-- "featuring a flat screen TV" ❌ (electronics - temporary item)
-- "The microwave and microwave oven" ❌ (appliances - can be moved)
-- "A beautiful balcony with stunning views" ❌ (if balcony not in property details)
-- "The elegant curtains frame the windows" ❌ (decor - can be removed)
-
-**REMEMBER: When selling a property, buyers are purchasing the STRUCTURE and PERMANENT FEATURES, not the furniture or temporary items. Focus ONLY on what stays with the property.**
+Use the property address "{property_intro}" in Scene 1 only (e.g., "Welcome to {property_intro}").
 
 **OUTPUT FORMAT REMINDER:**
 - Each scene has ONLY two lines: "Scene X (time): Title" followed by "**Content/Narration:** [text]"
@@ -615,9 +1148,12 @@ Scene 3 ({get_time_range(3, len(photos))}): [Title based on Photo 3's scene_type
 
 **START WRITING ALL SCENES NOW - DO NOT STOP UNTIL SCENE {len(photos)} IS COMPLETE:**
 """
-            else:
-                # Fallback: generic listing template (no photo grounding)
-                prompt = f"""Write a complete real estate property listing video script for: {property_summary}
+        # Static rules first, per-property data last, so providers with
+        # prefix caching reuse the shared part across requests
+        prompt = _PHOTO_LISTING_PROMPT_PREFIX + _canonical_prompt(dynamic_part)
+    else:
+        # Fallback: generic listing template (no photo grounding)
+        prompt = f"""Write a complete real estate property listing video script for: {property_summary}
 
 **VIDEO SPECIFICATIONS:**
 - Target Audience: Home buyers and real estate investors
@@ -670,9 +1206,19 @@ Scene 2 (0:30-1:00): [Scene Title Here]
 **PROPERTY FEATURES TO HIGHLIGHT:** {features_list}
 **TOPIC:** {topic}
 """
-        
-        elif video_type == 'neighborhood_guide':
-            prompt = f"""Write a complete neighborhood guide video script for: {topic}
+    
+    return prompt
+
+
+def _neighborhood_guide_prompt(ctx: _PromptContext) -> str:
+    """Neighbourhood guide script."""
+    topic = ctx.topic
+    image_count = ctx.image_count
+    word_count = ctx.word_count
+    per_scene_words = ctx.per_scene_words
+    real_estate_context = ctx.real_estate_context
+    
+    prompt = f"""Write a complete neighborhood guide video script for: {topic}
 
 **VIDEO SPECIFICATIONS:**
 - Target Audience: Potential home buyers and residents
@@ -724,9 +1270,19 @@ Scene 2 (0:30-1:00): [Scene Title Here]
 
 **TOPIC:** {topic}
 """
-        
-        elif video_type == 'market_update':
-            prompt = f"""Write a complete real estate market update video script for: {topic}
+    
+    return prompt
+
+
+def _market_update_prompt(ctx: _PromptContext) -> str:
+    """Market update script."""
+    topic = ctx.topic
+    image_count = ctx.image_count
+    word_count = ctx.word_count
+    per_scene_words = ctx.per_scene_words
+    real_estate_context = ctx.real_estate_context
+    
+    prompt = f"""Write a complete real estate market update video script for: {topic}
 
 **VIDEO SPECIFICATIONS:**
 - Target Audience: Home buyers, sellers, and real estate investors
@@ -778,10 +1334,19 @@ Scene 2 (0:30-1:00): [Scene Title Here]
 
 **TOPIC:** {topic}
 """
-        
-        else:
-            # Default script mode (general purpose)
-            prompt = f"""Write a complete YouTube video script based on the title: "{topic}".
+    
+    return prompt
+
+
+def _default_script_prompt(ctx: _PromptContext) -> str:
+    """General-purpose YouTube script."""
+    topic = ctx.topic
+    image_count = ctx.image_count
+    word_count = ctx.word_count
+    per_scene_words = ctx.per_scene_words
+    real_estate_context = ctx.real_estate_context
+    
+    prompt = f"""Write a complete YouTube video script based on the title: "{topic}".
 
 **VIDEO SPECIFICATIONS:**
 - Target Audience: General audience (4th-grade reading level)
@@ -824,19 +1389,17 @@ Scene 2 (0:30-1:00): [Scene Title Here]
 **TOPIC:** {topic}
 """
     
-    # Add style
-    if style_name:
-        prompt += f"\n\nUse the style: {style_name}."
-    
-    # Add context
-    if context_mode == 'video' and transcript:
-        prompt += f"\n\nUse this transcript for structure inspiration: {transcript[:500]}..."
-    if context_mode == 'web' and web_data:
-        prompt += f"\n\nUse these facts: {web_data[:500]}..."
-    
     return prompt
 
 
+# Script-mode templates by video type; anything else gets the general-purpose one
+_SCRIPT_PROMPT_BUILDERS = {
+    'listing': _listing_prompt,
+    'neighborhood_guide': _neighborhood_guide_prompt,
+    'market_update': _market_update_prompt,
+}
+
+
 def generate_mock_script(topic: str, image_count: int, mode: str) -> str:
     """Generate mock script for development/testing."""
     if mode == 'outline':
@@ -857,43 +1420,61 @@ def _strip_intro_to_first_scene(text: str) -> str:
         return text
     
     # Find first Scene marker
-    scene_match = re.search(r'Scene\s+1[\s:]', text, re.IGNORECASE)
+    scene_match = _SCENE1_RE.search(text)
     if scene_match:
         scene_index = scene_match.start()
         if scene_index > 0:
             text = text[scene_index:]
-            print(f'Removed intro text, script now starts with: {text[:50]}...')
+            logger.debug('Removed intro text, script now starts with: %s...', text[:50])
     
     # Find last Scene marker and remove everything after it that looks like notes/meta-commentary
-    scene_matches = list(re.finditer(r'Scene\s+\d+[\s:]', text, re.IGNORECASE))
+    scene_matches = list(_SCENE_HEADER_RE.finditer(text))
     if scene_matches:
         last_scene_match = scene_matches[-1]
         # Find the end of the last scene's Content/Narration section
         # Look for patterns like "Note:", "I've written", "according to", etc. after the last scene
-        note_patterns = [
-            r'\n\s*Note:.*$',
-            r'\n\s*I\'ve written.*$',
-            r'\n\s*according to.*$',
-            r'\n\s*This script.*$',
-        ]
-        for pattern in note_patterns:
-            note_match = re.search(pattern, text[last_scene_match.end():], re.IGNORECASE | re.DOTALL)
+        for pattern in _TRAILING_NOTE_RES:
+            note_match = pattern.search(text, last_scene_match.end())
             if note_match:
-                text = text[:last_scene_match.end() + note_match.start()]
-                print(f'Removed trailing note/meta-commentary')
+                text = text[:note_match.start()]
+                logger.debug('Removed trailing note/meta-commentary')
                 break
     
-    # Validate that we have Scene structure
-    scene_count = len(re.findall(r'Scene\s+\d+', text, re.IGNORECASE))
+    # Validate that we have Scene structure; trailing notes are only cut after
+    # the last header, so the headers found above are still all present
+    scene_count = len(scene_matches)
     if scene_count == 0:
-        print('⚠️  WARNING: No Scene markers found in generated script!')
-        print(f'First 200 chars: {text[:200]}')
+        logger.warning('No Scene markers found in generated script! First 200 chars: %s', text[:200])
     else:
-        print(f'✓ Found {scene_count} Scene markers in generated script')
+        logger.debug('Found %s Scene markers in generated script', scene_count)
     
     return text.strip()
 
 
+def _scene_count(
+    image_count: int,
+    photos: Optional[list[dict]],
+    video_type: Optional[str],
+    property_address: Optional[str] = None,
+    property_type: Optional[str] = None,
+) -> int:
+    """Scenes the prompt asks for: one per photo for photo-grounded listings.
+
+    Mirrors `_listing_prompt`, which only grounds in photos when the property
+    has an address or type and otherwise asks for `image_count` scenes.
+    """
+    if photos and video_type == 'listing' and (property_address or property_type):
+        return len(photos)
+    return image_count
+
+
+def _stop_after_scene(mode: str, scene_count: int) -> Optional[list[str]]:
+    """Stop sequence ending generation if the model starts a scene past the last one."""
+    if mode != 'script' or scene_count < 1:
+        return None
+    return [f"\nScene {scene_count + 1}"]
+
+
 def _estimate_max_tokens(word_count: int, mode: str, image_count: int = 10) -> int:
     """Rough estimate of tokens required for Groq completions."""
     if mode == 'outline':
@@ -2,19 +2,43 @@
 System Text-to-Speech Service
 Uses your computer's built-in TTS - no API keys needed!
 """
+import array
 import os
 import io
 import math
+import struct
+import sys
+from functools import lru_cache
 
 try:
     import pyttsx3
 except ImportError:
     pyttsx3 = None
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Canonical 44-byte PCM WAV header: RIFF chunk, 16-byte fmt chunk, data chunk header
+_WAV_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+
+
+def _wav_header(data_size: int, sample_rate: int, channels: int = 1, bits_per_sample: int = 16) -> bytes:
+    """Build the header for `data_size` bytes of PCM audio"""
+    block_align = channels * bits_per_sample // 8
+    return _WAV_HEADER.pack(
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, channels, sample_rate, sample_rate * block_align, block_align, bits_per_sample,
+        b'data', data_size,
+    )
+
 class SystemTTSService:
     def __init__(self):
         if not pyttsx3:
             print("⚠️  pyttsx3 not installed. Using mock audio.")
+        # voice name -> pyttsx3 voice id (None = engine default), resolved once
+        self._voice_ids = {}
     
     def generate_speech(self, text: str, voice_name: str = "default") -> bytes:
         """
@@ -27,6 +51,10 @@ class SystemTTSService:
         Returns:
             Audio bytes in WAV format
         """
+        # Nothing to say: skip spawning `say`/pyttsx3 and return an empty WAV
+        if not text or not text.strip():
+            return _wav_header(0, 22050)
+        
         # Try macOS 'say' command first (more reliable)
         if os.name == 'posix':  # macOS/Linux
             try:
@@ -43,14 +71,10 @@ class SystemTTSService:
             engine = pyttsx3.init()
             
             # Set voice properties
-            voices = engine.getProperty('voices')
-            if voices:
-                # Try to find the requested voice
-                if voice_name.lower() == "female" and len(voices) > 1:
-                    engine.setProperty('voice', voices[1].id)  # Usually female
-                elif voice_name.lower() == "male" and len(voices) > 0:
-                    engine.setProperty('voice', voices[0].id)  # Usually male
-                # Default voice is already set
+            voice_id = self._resolve_voice_id(engine, voice_name)
+            if voice_id:
+                engine.setProperty('voice', voice_id)
+            # Default voice is already set
             
             # Set speech rate (words per minute)
             engine.setProperty('rate', 150)  # Normal speaking rate
@@ -86,6 +110,20 @@ class SystemTTSService:
             print(f"System TTS error: {e}")
             return self._generate_realistic_mock_audio(text)
     
+    def _resolve_voice_id(self, engine, voice_name: str):
+        """Map a friendly voice name to a pyttsx3 voice id, enumerating voices only once."""
+        key = voice_name.lower()
+        if key not in self._voice_ids:
+            voices = engine.getProperty('voices') or []
+            voice_id = None
+            # Try to find the requested voice
+            if key == "female" and len(voices) > 1:
+                voice_id = voices[1].id  # Usually female
+            elif key == "male" and len(voices) > 0:
+                voice_id = voices[0].id  # Usually male
+            self._voice_ids[key] = voice_id
+        return self._voice_ids[key]
+    
     def _generate_with_say_command(self, text: str, voice_name: str) -> bytes:
         """
         Generate speech using macOS 'say' command with proper WAV conversion
@@ -176,35 +214,65 @@ class SystemTTSService:
         # Extract audio data (skip AIFF header, keep audio data)
         audio_data = aiff_data[54:]  # Skip AIFF header
         
-        # Create WAV header
-        data_size = len(audio_data)
-        total_size = 36 + data_size
+        # Mono 16-bit PCM at 44.1 kHz
+        wav_header = _wav_header(len(audio_data), 44100)
+        
+        return wav_header + audio_data
+    
+    def _mock_speech_samples(self, words, samples_per_word: int, num_samples: int, sample_rate: int) -> bytes:
+        """16-bit PCM for the mock audio without NumPy; samples are packed by `array` in one C call"""
+        samples = array.array('h', bytes(num_samples * 2))  # silence
         
-        wav_header = bytearray([
-            # RIFF header
-            0x52, 0x49, 0x46, 0x46,  # "RIFF"
-            0x00, 0x00, 0x00, 0x00,  # File size - 8 (will be updated)
-            0x57, 0x41, 0x56, 0x45,  # "WAVE"
+        for word_idx, word in enumerate(words):
+            start_sample = word_idx * samples_per_word
+            end_sample = min((word_idx + 1) * samples_per_word, num_samples)
             
-            # fmt chunk
-            0x66, 0x6D, 0x74, 0x20,  # "fmt "
-            0x10, 0x00, 0x00, 0x00,  # fmt chunk size (16)
-            0x01, 0x00,              # Audio format (PCM)
-            0x01, 0x00,              # Number of channels (1)
-            0x44, 0xAC, 0x00, 0x00,  # Sample rate (22050)
-            0x88, 0x58, 0x01, 0x00,  # Byte rate (44100)
-            0x02, 0x00,              # Block align (2)
-            0x10, 0x00,              # Bits per sample (16)
+            # Vary frequency based on word length and position
+            base_freq = 200 + (len(word) * 10)  # Longer words = higher pitch
+            freq_variation = 50 * math.sin(word_idx * 0.5)  # Vary over time
+            freq = base_freq + freq_variation
             
-            # data chunk
-            0x64, 0x61, 0x74, 0x61,  # "data"
-        ])
+            for i in range(start_sample, end_sample):
+                # Create speech-like rhythm with pauses
+                if i % (samples_per_word // 3) == 0:  # Pause between syllables
+                    continue
+                # Vary amplitude for speech-like quality
+                amplitude = 0.2 + 0.1 * math.sin(i * 0.01)  # Varying amplitude
+                
+                # Add some harmonics for richer sound
+                samples[i] = int(32767 * amplitude * (
+                    math.sin(2 * math.pi * freq * i / sample_rate) +
+                    0.3 * math.sin(2 * math.pi * freq * 2 * i / sample_rate) +
+                    0.1 * math.sin(2 * math.pi * freq * 3 * i / sample_rate)
+                ))
+        
+        # WAV data is little-endian
+        if sys.byteorder == 'big':
+            samples.byteswap()
+        return samples.tobytes()
+    
+    def _mock_speech_samples_np(self, words, samples_per_word: int, num_samples: int, sample_rate: int) -> bytes:
+        """Vectorized `_mock_speech_samples`: the same waveform computed with NumPy"""
+        audio = np.zeros(num_samples, dtype='<i2')
+        if not words:
+            return audio.tobytes()
         
-        # Update file size in header
-        wav_header[4:8] = total_size.to_bytes(4, byteorder='little')
-        wav_header[40:44] = data_size.to_bytes(4, byteorder='little')
+        i = np.arange(len(words) * samples_per_word)
+        word_idx = i // samples_per_word
         
-        return bytes(wav_header) + audio_data
+        # Vary frequency based on word length and position
+        word_lengths = np.array([len(word) for word in words])
+        word_freqs = 200 + word_lengths * 10 + 50 * np.sin(np.arange(len(words)) * 0.5)
+        
+        # Varying amplitude, plus harmonics for a richer sound
+        amplitude = 0.2 + 0.1 * np.sin(i * 0.01)
+        phase = 2 * np.pi * word_freqs[word_idx] * i / sample_rate
+        samples = 32767 * amplitude * (np.sin(phase) + 0.3 * np.sin(2 * phase) + 0.1 * np.sin(3 * phase))
+        
+        # Pause between syllables
+        samples[i % (samples_per_word // 3) == 0] = 0
+        audio[:len(i)] = np.trunc(samples)
+        return audio.tobytes()
     
     def _generate_realistic_mock_audio(self, text: str) -> bytes:
         """
@@ -214,73 +282,16 @@ class SystemTTSService:
         duration = max(2, len(text) * 0.08)  # Roughly 0.08 seconds per character
         num_samples = int(sample_rate * duration)
         
-        audio_data = bytearray()
-        
         # Create speech-like patterns with varying frequencies and pauses
         words = text.split()
         samples_per_word = num_samples // max(1, len(words))
         
-        for word_idx, word in enumerate(words):
-            start_sample = word_idx * samples_per_word
-            end_sample = min((word_idx + 1) * samples_per_word, num_samples)
-            
-            # Vary frequency based on word length and position
-            base_freq = 200 + (len(word) * 10)  # Longer words = higher pitch
-            freq_variation = 50 * math.sin(word_idx * 0.5)  # Vary over time
-            
-            for i in range(start_sample, end_sample):
-                if i < num_samples:
-                    # Create speech-like rhythm with pauses
-                    if i % (samples_per_word // 3) == 0:  # Pause between syllables
-                        sample = 0
-                    else:
-                        # Vary frequency and amplitude for speech-like quality
-                        freq = base_freq + freq_variation
-                        amplitude = 0.2 + 0.1 * math.sin(i * 0.01)  # Varying amplitude
-                        
-                        # Add some harmonics for richer sound
-                        sample = int(32767 * amplitude * (
-                            math.sin(2 * math.pi * freq * i / sample_rate) +
-                            0.3 * math.sin(2 * math.pi * freq * 2 * i / sample_rate) +
-                            0.1 * math.sin(2 * math.pi * freq * 3 * i / sample_rate)
-                        ))
-                    
-                    # Convert to 16-bit little-endian
-                    audio_data.extend(sample.to_bytes(2, byteorder='little', signed=True))
-        
-        # Pad with silence if needed
-        while len(audio_data) < num_samples * 2:
-            audio_data.extend((0).to_bytes(2, byteorder='little', signed=True))
-        
-        data_size = len(audio_data)
-        
-        # WAV header (44 bytes)
-        header = bytearray([
-            # RIFF header
-            0x52, 0x49, 0x46, 0x46,  # "RIFF"
-            0x24, 0x00, 0x00, 0x00,  # File size - 8 (will be updated)
-            0x57, 0x41, 0x56, 0x45,  # "WAVE"
-            
-            # fmt chunk
-            0x66, 0x6D, 0x74, 0x20,  # "fmt "
-            0x10, 0x00, 0x00, 0x00,  # fmt chunk size (16)
-            0x01, 0x00,              # Audio format (PCM)
-            0x01, 0x00,              # Number of channels (1)
-            0x22, 0x56, 0x00, 0x00,  # Sample rate (22050)
-            0x44, 0xAC, 0x00, 0x00,  # Byte rate (44100)
-            0x02, 0x00,              # Block align (2)
-            0x10, 0x00,              # Bits per sample (16)
-            
-            # data chunk
-            0x64, 0x61, 0x74, 0x61,  # "data"
-        ])
-        
-        # Calculate and update file size
-        total_size = 36 + data_size
-        header[4:8] = total_size.to_bytes(4, byteorder='little')
-        header[40:44] = data_size.to_bytes(4, byteorder='little')
+        if np is not None:
+            audio_data = self._mock_speech_samples_np(words, samples_per_word, num_samples, sample_rate)
+        else:
+            audio_data = self._mock_speech_samples(words, samples_per_word, num_samples, sample_rate)
         
-        return bytes(header) + bytes(audio_data)
+        return _wav_header(len(audio_data), sample_rate) + bytes(audio_data)
 
 # Available system voices (depends on your OS)
 SYSTEM_VOICES = {
@@ -289,6 +300,7 @@ SYSTEM_VOICES = {
     "male": "male",          # Male voice (if available)
 }
 
+@lru_cache(maxsize=64)
 def get_voice_by_name(voice_name: str) -> str:
     """Get system voice by friendly name"""
     return SYSTEM_VOICES.get(voice_name.lower(), "default")
@@ -0,0 +1,31 @@
+import importlib
+import io
+import unittest
+
+from PIL import Image
+
+try:
+    photo_analysis = importlib.import_module('services.photo_analysis')
+except ImportError:  # torch / transformers not installed
+    photo_analysis = None
+
+
+@unittest.skipIf(photo_analysis is None, 'photo analysis dependencies not installed')
+class DecodeForBlipTests(unittest.TestCase):
+    def _png_bytes(self, image: Image.Image) -> bytes:
+        buf = io.BytesIO()
+        image.save(buf, format='PNG')
+        return buf.getvalue()
+
+    def test_large_palette_png_is_reduced_to_rgb(self) -> None:
+        image = Image.new('RGB', (1600, 1200), (200, 30, 30)).convert('P', palette=Image.Palette.ADAPTIVE)
+        decoded = photo_analysis._decode_for_blip(self._png_bytes(image))
+
+        self.assertEqual(decoded.mode, 'RGB')
+        self.assertGreaterEqual(min(decoded.size), photo_analysis.BLIP_INPUT_SIZE)
+        self.assertLess(decoded.width, 1600)
+        self.assertEqual(decoded.getpixel((0, 0)), (200, 30, 30))
+
+
+if __name__ == '__main__':
+    unittest.main()
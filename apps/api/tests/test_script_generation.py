@@ -0,0 +1,313 @@
+import json
+import unittest
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+
+from services import script_generation as sg
+
+
+def _groq_ok(content: str = 'Scene 1: Hello') -> httpx.Response:
+    return httpx.Response(200, json={'choices': [{'message': {'content': content}}]})
+
+
+class GroqTestCase(unittest.IsolatedAsyncioTestCase):
+    """Routes Groq calls through a stub transport and resets the circuit."""
+
+    def setUp(self) -> None:
+        self.responses: list = []
+        self.calls = 0
+        self.clock = SimpleNamespace(now=1000.0)
+        patches = [
+            mock.patch.dict(sg._groq_circuit, {'failures': 0, 'window_start': 0.0, 'open_until': 0.0}),
+            mock.patch.object(sg, '_groq_backoff', return_value=0),
+            mock.patch.object(sg, 'time', SimpleNamespace(monotonic=lambda: self.clock.now)),
+            mock.patch.object(sg, 'GROQ_API_KEY', 'test-key'),
+            mock.patch.object(sg, 'SCRIPT_CACHE_ENABLED', False),
+            mock.patch.object(sg, '_http_client', httpx.AsyncClient(transport=httpx.MockTransport(self._handle))),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    async def _generate(self, **kwargs) -> str:
+        return await sg._generate_with_groq(api_key='test-key', prompt='p', temperature=0.7, max_tokens=100, **kwargs)
+
+    async def _fail_via_provider(self, times: int) -> None:
+        for i in range(times):
+            with self.assertRaises(Exception):
+                await sg.generate_script_with_gemini(topic=f'topic {i}', model_provider='groq', use_cache=False)
+
+
+class GroqRetryTests(GroqTestCase):
+    async def test_retries_transient_status_then_succeeds(self) -> None:
+        self.responses = [httpx.Response(503), httpx.Response(429), _groq_ok('Scene 1: ok')]
+        self.assertEqual(await self._generate(), 'Scene 1: ok')
+        self.assertEqual(self.calls, 3)
+
+    async def test_retries_connect_errors(self) -> None:
+        self.responses = [httpx.ConnectError('refused'), _groq_ok()]
+        self.assertEqual(await self._generate(), 'Scene 1: Hello')
+        self.assertEqual(self.calls, 2)
+
+    async def test_gives_up_after_max_retries(self) -> None:
+        self.responses = [httpx.Response(503)]
+        with self.assertRaises(sg.GroqAPIError) as ctx:
+            await self._generate()
+        self.assertEqual(ctx.exception.status_code, 503)
+        self.assertEqual(self.calls, sg.GROQ_MAX_RETRIES + 1)
+
+    async def test_client_errors_are_not_retried(self) -> None:
+        self.responses = [httpx.Response(400, json={'error': 'model not found'})]
+        with self.assertRaises(sg.GroqAPIError) as ctx:
+            await self._generate()
+        self.assertEqual(ctx.exception.status_code, 400)
+        self.assertEqual(self.calls, 1)
+
+
+class GroqBackoffTests(unittest.TestCase):
+    def test_backoff_honours_retry_after_and_caps_it(self) -> None:
+        self.assertEqual(sg._groq_backoff(0, '2'), 2.0)
+        self.assertEqual(sg._groq_backoff(0, '120'), 5.0)
+        self.assertLessEqual(sg._groq_backoff(10), 8.0)
+        self.assertGreaterEqual(sg._groq_backoff(1, 'soon'), 2.0)
+
+
+class GroqCircuitTests(GroqTestCase):
+    async def test_client_errors_do_not_open_the_circuit(self) -> None:
+        self.responses = [httpx.Response(400, json={'error': 'model not found'})]
+        await self._fail_via_provider(sg.GROQ_CIRCUIT_THRESHOLD + 1)
+        self.assertTrue(sg._groq_available())
+
+    async def test_outages_open_the_circuit(self) -> None:
+        self.responses = [httpx.Response(503)]
+        await self._fail_via_provider(sg.GROQ_CIRCUIT_THRESHOLD - 1)
+        self.assertTrue(sg._groq_available())
+
+        await self._fail_via_provider(1)
+        self.assertFalse(sg._groq_available())
+
+        # While open, Groq is skipped without a request
+        calls = self.calls
+        await self._fail_via_provider(1)
+        self.assertEqual(self.calls, calls)
+
+    async def test_circuit_half_opens_after_cooldown(self) -> None:
+        self.responses = [httpx.Response(503)]
+        await self._fail_via_provider(sg.GROQ_CIRCUIT_THRESHOLD)
+        self.assertFalse(sg._groq_available())
+
+        self.clock.now += sg.GROQ_CIRCUIT_COOLDOWN
+        self.assertTrue(sg._groq_available())
+
+        self.responses = [_groq_ok('Scene 1: back')]
+        script = await sg.generate_script_with_gemini(topic='after cooldown', model_provider='groq', use_cache=False)
+        self.assertEqual(script, 'Scene 1: back')
+        self.assertEqual(sg._groq_circuit['failures'], 0)
+
+    async def test_failures_outside_the_window_are_forgotten(self) -> None:
+        self.responses = [httpx.Response(503)]
+        await self._fail_via_provider(sg.GROQ_CIRCUIT_THRESHOLD - 1)
+        self.clock.now += sg.GROQ_CIRCUIT_WINDOW + 1
+        await self._fail_via_provider(1)
+        self.assertTrue(sg._groq_available())
+
+
+class LLMCacheKeyTests(unittest.TestCase):
+    def _key(self, **overrides) -> str:
+        args = {'prompt': 'p', 'provider': 'groq', 'model_name': None, 'temperature': 0.7, 'max_tokens': 1000}
+        args.update(overrides)
+        return sg._llm_cache_key(**args)
+
+    def test_key_is_stable(self) -> None:
+        self.assertEqual(self._key(), self._key())
+        self.assertEqual(self._key(temperature=0.7), self._key(temperature=0.70000001))
+        self.assertEqual(self._key(model_name=None), self._key(model_name=''))
+
+    def test_key_separates_every_input(self) -> None:
+        keys = {
+            self._key(),
+            self._key(prompt='q'),
+            self._key(provider='openai'),
+            self._key(model_name='llama-3.3-70b-versatile'),
+            self._key(temperature=0.8),
+            self._key(max_tokens=1001),
+        }
+        self.assertEqual(len(keys), 6)
+
+
+class FakeCacheTable:
+    """Minimal llm_cache table honouring the created_at >= cutoff filter."""
+
+    def __init__(self, rows: dict) -> None:
+        self.rows = rows
+        self.filters: dict = {}
+
+    def select(self, *_):
+        return self
+
+    def limit(self, *_):
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def gte(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def execute(self):
+        row = self.rows.get(self.filters['key'])
+        fresh = row is not None and row['created_at'] >= self.filters['created_at']
+        return SimpleNamespace(data=[row] if fresh else [])
+
+
+class ScriptCacheTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.clock = SimpleNamespace(now=1000.0)
+        self.rows: dict = {}
+        supabase = SimpleNamespace(table=lambda name: FakeCacheTable(self.rows))
+        patches = [
+            mock.patch.object(sg, '_memory_cache', OrderedDict()),
+            mock.patch.object(sg, 'time', SimpleNamespace(monotonic=lambda: self.clock.now)),
+            mock.patch('db.client.get_supabase', return_value=supabase),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _row(self, response: str, age) -> dict:
+        created_at = (datetime.now(timezone.utc) - age).isoformat()
+        return {'response': response, 'created_at': created_at}
+
+    async def test_memory_hit_within_ttl(self) -> None:
+        sg._remember_script('k', 'Scene 1: cached')
+        self.clock.now += sg.MEMORY_CACHE_TTL - 1
+        self.assertEqual(await sg._lookup_cached_script('k'), 'Scene 1: cached')
+
+    async def test_memory_entry_expires_and_falls_back_to_db(self) -> None:
+        sg._remember_script('k', 'Scene 1: stale')
+        self.rows['k'] = self._row('Scene 1: from db', timedelta(hours=1))
+        self.clock.now += sg.MEMORY_CACHE_TTL
+        self.assertEqual(await sg._lookup_cached_script('k'), 'Scene 1: from db')
+        # The DB hit is promoted back into memory
+        self.assertEqual(sg._memory_cache['k'][1], 'Scene 1: from db')
+
+    async def test_db_rows_older_than_ttl_are_ignored(self) -> None:
+        self.rows['k'] = self._row('Scene 1: old', sg.LLM_CACHE_TTL + timedelta(minutes=1))
+        self.assertIsNone(await sg._lookup_cached_script('k'))
+
+    def test_lru_evicts_oldest_entry(self) -> None:
+        with mock.patch.object(sg, 'MEMORY_CACHE_SIZE', 2):
+            sg._remember_script('a', 'A')
+            sg._remember_script('b', 'B')
+            sg._remember_script('c', 'C')
+        self.assertEqual(list(sg._memory_cache), ['b', 'c'])
+
+    async def test_lookup_hit_refreshes_recency(self) -> None:
+        with mock.patch.object(sg, 'MEMORY_CACHE_SIZE', 2):
+            sg._remember_script('a', 'A')
+            sg._remember_script('b', 'B')
+            await sg._lookup_cached_script('a')
+            sg._remember_script('c', 'C')
+        self.assertEqual(list(sg._memory_cache), ['a', 'c'])
+
+
+class SceneCountTests(unittest.TestCase):
+    photos = [{'id': str(i)} for i in range(5)]
+
+    def test_photo_grounded_listing_has_one_scene_per_photo(self) -> None:
+        self.assertEqual(sg._scene_count(10, self.photos, 'listing', '1 Main St'), 5)
+        self.assertEqual(sg._scene_count(10, self.photos, 'listing', None, 'condo'), 5)
+
+    def test_other_scripts_use_image_count(self) -> None:
+        cases = [
+            (self.photos, 'listing', None, None),  # listing prompt falls back to the default
+            (None, 'listing', '1 Main St', None),
+            (self.photos, 'neighborhood_guide', '1 Main St', None),
+            (self.photos, None, None, None),
+        ]
+        for photos, video_type, address, property_type in cases:
+            with self.subTest(video_type=video_type, address=address):
+                self.assertEqual(sg._scene_count(10, photos, video_type, address, property_type), 10)
+
+    def test_stop_after_last_scene(self) -> None:
+        self.assertEqual(sg._stop_after_scene('script', 5), ['\nScene 6'])
+        self.assertIsNone(sg._stop_after_scene('outline', 5))
+        self.assertIsNone(sg._stop_after_scene('rewrite', 5))
+
+    def test_no_stop_without_scenes(self) -> None:
+        self.assertIsNone(sg._stop_after_scene('script', 0))
+
+
+_PHOTOS = [
+    {'id': 'a', 'scene_type': 'kitchen', 'caption': 'a kitchen with an island', 'features': ['marble island']},
+    {'id': 'b', 'scene_type': 'bedroom', 'caption': None, 'features': []},
+]
+_PROPERTY = {
+    'property_address': '1 Main St',
+    'property_type': 'house',
+    'property_price': 450000.0,
+    'bedrooms': 3,
+    'bathrooms': 2.5,
+    'square_feet': 1800,
+    'mls_number': 'MLS123',
+    'property_features': ['open_plan', 'pool'],
+}
+_VIDEO_TYPES = {
+    'default': {},
+    'listing': {'video_type': 'listing', 'photos': _PHOTOS, **_PROPERTY},
+    'listing_without_address_or_type': {'video_type': 'listing', 'photos': _PHOTOS, 'bedrooms': 3},
+    'neighborhood_guide': {'video_type': 'neighborhood_guide', **_PROPERTY},
+    'market_update': {'video_type': 'market_update', **_PROPERTY},
+}
+_MODES = {
+    'script': {'mode': 'script'},
+    'outline': {'mode': 'outline'},
+    'rewrite': {'mode': 'rewrite', 'selection': 'Scene 1: The kitchen shines.'},
+    'rewrite_without_selection': {'mode': 'rewrite'},
+}
+BUILD_PROMPT_CASES = {
+    f'{mode}/{video_type}': {
+        'topic': 'Family home tour',
+        'image_count': 4,
+        'word_count': 400,
+        'style_name': 'warm',
+        **mode_args,
+        **video_args,
+    }
+    for mode, mode_args in _MODES.items()
+    for video_type, video_args in _VIDEO_TYPES.items()
+}
+# Prompts produced by the if/elif build_prompt before it moved to a dispatch table
+BUILD_PROMPT_SNAPSHOTS = Path(__file__).parent / 'fixtures' / 'build_prompt_snapshots.json'
+
+
+class BuildPromptTests(unittest.TestCase):
+    def test_prompts_match_snapshots(self) -> None:
+        snapshots = json.loads(BUILD_PROMPT_SNAPSHOTS.read_text(encoding='utf-8'))
+        self.assertEqual(set(snapshots), set(BUILD_PROMPT_CASES))
+        for name, kwargs in BUILD_PROMPT_CASES.items():
+            with self.subTest(case=name):
+                self.assertEqual(sg.build_prompt(**kwargs), snapshots[name])
+
+    def test_listing_without_address_or_type_uses_default_template(self) -> None:
+        listing = BUILD_PROMPT_CASES['script/listing_without_address_or_type']
+        default = dict(listing, video_type=None)
+        self.assertEqual(sg.build_prompt(**listing), sg.build_prompt(**default))
+
+
+if __name__ == '__main__':
+    unittest.main()
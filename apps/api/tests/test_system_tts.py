@@ -0,0 +1,47 @@
+import io
+import unittest
+import wave
+from unittest import mock
+
+from services import system_tts
+from services.system_tts import SystemTTSService, _wav_header
+
+
+class WavHeaderTests(unittest.TestCase):
+    def test_header_parses_as_pcm_wav(self) -> None:
+        frames = b'\x01\x00\xff\x7f' * 100
+        with wave.open(io.BytesIO(_wav_header(len(frames), 22050) + frames)) as wav:
+            self.assertEqual(wav.getnchannels(), 1)
+            self.assertEqual(wav.getsampwidth(), 2)
+            self.assertEqual(wav.getframerate(), 22050)
+            self.assertEqual(wav.getnframes(), 200)
+            self.assertEqual(wav.readframes(200), frames)
+
+    def test_header_is_44_bytes(self) -> None:
+        self.assertEqual(len(_wav_header(0, 22050)), 44)
+
+
+class MockAudioTests(unittest.TestCase):
+    text = 'A bright kitchen with marble counters and a view of the harbour'
+
+    def _mock_audio(self, use_numpy: bool) -> bytes:
+        np = system_tts.np if use_numpy else None
+        with mock.patch.object(system_tts, 'np', np):
+            return SystemTTSService()._generate_realistic_mock_audio(self.text)
+
+    @unittest.skipIf(system_tts.np is None, 'numpy not installed')
+    def test_numpy_and_array_paths_produce_identical_samples(self) -> None:
+        self.assertEqual(self._mock_audio(use_numpy=True), self._mock_audio(use_numpy=False))
+
+    def test_mock_audio_is_a_valid_wav(self) -> None:
+        with wave.open(io.BytesIO(self._mock_audio(use_numpy=False))) as wav:
+            self.assertEqual(wav.getframerate(), 22050)
+            self.assertEqual(wav.getnframes(), int(22050 * len(self.text) * 0.08))
+
+    def test_blank_text_is_an_empty_wav(self) -> None:
+        with wave.open(io.BytesIO(SystemTTSService().generate_speech('   '))) as wav:
+            self.assertEqual(wav.getnframes(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
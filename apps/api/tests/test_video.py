@@ -0,0 +1,95 @@
+import base64
+import os
+import tempfile
+import unittest
+import wave
+
+from routes import video
+
+
+class SpeechWeightTests(unittest.TestCase):
+    def test_count_syllables(self) -> None:
+        # Vowel groups, so this is an approximation (silent e counts, "ea" doesn't split)
+        cases = {
+            'cat': 1,
+            'kitchen': 2,
+            'beautiful': 3,
+            'Oceanfront': 3,
+            'rhythm': 1,
+            'home': 2,
+            'I': 1,
+            '42': 1,
+            '': 1,
+        }
+        for word, syllables in cases.items():
+            with self.subTest(word=word):
+                self.assertEqual(video._count_syllables(word), syllables)
+
+    def test_speech_weight_sums_words(self) -> None:
+        self.assertEqual(video._speech_weight('A beautiful  kitchen\n'), 6)
+        self.assertEqual(video._speech_weight(''), 0)
+
+
+class SceneTimingTests(unittest.TestCase):
+    def _durations(self, script: str, audio_duration: float) -> list:
+        return [
+            (t['scene_number'], t['start_time'], t['end_time'])
+            for t in video._parse_scene_timings(script, audio_duration)
+        ]
+
+    def test_duration_split_follows_syllables(self) -> None:
+        script = 'Scene 1:\nthe cat\nScene 2:\nbeautiful kitchen'
+        self.assertEqual(self._durations(script, 14.0), [(1, 0, 4.0), (2, 4.0, 14.0)])
+
+    def test_explicit_timestamps_win(self) -> None:
+        script = 'Scene 1 (0:00-0:05)\nthe cat\nScene 2 (0:05-0:12)\nbeautiful kitchen'
+        self.assertEqual(self._durations(script, 14.0), [(1, 0, 5), (2, 5, 12)])
+
+    def test_scenes_without_text_split_evenly(self) -> None:
+        script = 'Scene 1: Kitchen\nScene 2: Bedroom\nScene 3: Garden'
+        self.assertEqual(self._durations(script, 9.0), [(1, 0.0, 3.0), (2, 3.0, 6.0), (3, 6.0, 9.0)])
+
+    def test_no_scenes(self) -> None:
+        self.assertEqual(video._parse_scene_timings('Just narration.', 10.0), [])
+
+
+class AudioFileTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir, name)
+
+    def test_decode_to_file_streams_across_chunks(self) -> None:
+        payload = os.urandom(video._B64_CHUNK * 2 + 1234)
+        data = 'data:audio/wav;base64,' + base64.b64encode(payload).decode('ascii')
+        header, start = video._data_url_header(data)
+
+        written = video._decode_to_file(data, start, self._path('audio.wav'))
+
+        self.assertEqual(header, 'data:audio/wav;base64')
+        self.assertEqual(written, len(payload))
+        with open(self._path('audio.wav'), 'rb') as f:
+            self.assertEqual(f.read(), payload)
+
+    def test_wav_duration_reads_header(self) -> None:
+        with wave.open(self._path('audio.wav'), 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(22050)
+            wav.writeframes(b'\x00\x00' * 11025)
+        self.assertEqual(video._wav_duration(self._path('audio.wav')), 0.5)
+
+    def test_wav_duration_of_non_wav_is_none(self) -> None:
+        with open(self._path('audio.wav'), 'wb') as f:
+            f.write(b'ID3\x03\x00not a wav file')
+        self.assertIsNone(video._wav_duration(self._path('audio.wav')))
+
+        open(self._path('empty.wav'), 'wb').close()
+        self.assertIsNone(video._wav_duration(self._path('empty.wav')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -35,6 +35,7 @@ export async function POST(request: NextRequest) {
       propertyFeatures,
       modelProvider,
       modelName,
+      useCache = true,
     } = body;
 
     // For real estate videos, use property address as topic if topic is empty
@@ -120,7 +121,8 @@ export async function POST(request: NextRequest) {
         bathrooms: bathrooms,
         square_feet: squareFeet,
         mls_number: mlsNumber,
-        property_features: propertyFeatures
+        property_features: propertyFeatures,
+        use_cache: useCache,
       })
     });
 
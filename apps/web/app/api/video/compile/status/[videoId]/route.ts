@@ -0,0 +1,37 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { API_BASE } from '@/lib/config';
+
+export async function GET(
+  req: NextRequest,
+  { params }: { params: Promise<{ videoId: string }> }
+) {
+  try {
+    const { videoId } = await params;
+    const auth = req.headers.get('authorization') || '';
+
+    if (!auth) {
+      return NextResponse.json({ error: 'No authorization header provided' }, { status: 401 });
+    }
+
+    const resp = await fetch(`${API_BASE}/api/video/compile/status/${videoId}`, {
+      headers: { Authorization: auth },
+      cache: 'no-store',
+    });
+
+    const text = await resp.text();
+
+    let data: unknown;
+    try {
+      data = JSON.parse(text);
+    } catch {
+      data = { raw: text };
+    }
+
+    return NextResponse.json(data, { status: resp.status });
+  } catch (e: unknown) {
+    console.error('[VIDEO API] Status error:', e);
+    return NextResponse.json({
+      error: e instanceof Error ? e.message : 'Failed to fetch compile status',
+    }, { status: 500 });
+  }
+}
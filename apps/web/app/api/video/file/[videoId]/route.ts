@@ -56,14 +56,16 @@ export async function GET(
       );
     }
 
-    // Stream the video file
-    const videoBlob = await resp.blob();
-    return new NextResponse(videoBlob, {
-      headers: {
-        'Content-Type': 'video/mp4',
-        'Content-Disposition': `attachment; filename="video-${videoId}.mp4"`,
-      },
-    });
+    // Stream the video file through without buffering it in memory
+    const headers: Record<string, string> = {
+      'Content-Type': 'video/mp4',
+      'Content-Disposition': `attachment; filename="video-${videoId}.mp4"`,
+    };
+    const contentLength = resp.headers.get('content-length');
+    if (contentLength) {
+      headers['Content-Length'] = contentLength;
+    }
+    return new NextResponse(resp.body, { headers });
 
   } catch (error) {
     console.error('Video file API error:', error);
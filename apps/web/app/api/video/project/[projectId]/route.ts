@@ -15,11 +15,12 @@ export async function GET(
       return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
     }
 
-    // Get video for project
+    // Get latest finished video for project (compiles run in the background)
     const { data: video, error: videoError } = await supabase
       .from('videos')
       .select('*')
       .eq('project_id', projectId)
+      .eq('status', 'completed')
       .order('created_at', { ascending: false })
       .limit(1)
       .single();
@@ -0,0 +1,40 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { createClient } from '@/lib/supabase/server';
+import { API_BASE } from '@/lib/config';
+
+export async function GET(
+  request: NextRequest,
+  { params }: { params: Promise<{ voiceoverId: string }> }
+) {
+  try {
+    const supabase = await createClient();
+    const { voiceoverId } = await params;
+    
+    // Check authentication
+    const { data: { user }, error: authError } = await supabase.auth.getUser();
+    if (authError || !user) {
+      return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+    }
+
+    // Call FastAPI for a playable URL for this voiceover
+    const resp = await fetch(`${API_BASE}/api/voiceover/${voiceoverId}/audio`, {
+      method: 'GET',
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': `Bearer ${(await supabase.auth.getSession()).data.session?.access_token}`,
+      },
+    });
+
+    if (!resp.ok) {
+      const errorData = await resp.json().catch(() => ({ detail: 'Failed to fetch voiceover audio' }));
+      return NextResponse.json({ error: errorData.detail || 'Failed to fetch voiceover audio' }, { status: resp.status });
+    }
+
+    const data = await resp.json();
+    return NextResponse.json(data);
+
+  } catch (error) {
+    console.error('Voiceover audio API error:', error);
+    return NextResponse.json({ error: 'Internal server error' }, { status: 500 });
+  }
+}
@@ -44,20 +44,31 @@ export async function POST(request: NextRequest) {
     }
 
     const data = await resp.json();
-    const audioDataUrl: string | undefined = data?.audio_data_url;
-    if (!audioDataUrl || !audioDataUrl.startsWith('data:audio/')) {
+    if (resp.status === 202) {
+      // Synthesis continues in the background; the client polls /api/voiceover/{id}
+      return new Response(JSON.stringify({
+        voiceover_id: data?.voiceover_id,
+        status: data?.status,
+        success: data?.success
+      }), {
+        status: 202,
+        headers: {
+          'Content-Type': 'application/json',
+          'Cache-Control': 'no-store',
+        },
+      });
+    }
+    const audioUrl: string | undefined = data?.audio_url;
+    if (!audioUrl) {
       return new Response(JSON.stringify({ error: 'Invalid audio response' }), {
         status: 502,
         headers: { 'Content-Type': 'application/json' },
       });
     }
 
-    const base64 = audioDataUrl.split(',')[1] || '';
-    
-    // Return both the audio blob and the metadata
+    // Audio is played straight from its signed Storage URL; no inline base64
     return new Response(JSON.stringify({
-      audio_blob: base64,
-      audio_data_url: audioDataUrl,
+      audio_url: audioUrl,
       voiceover_id: data?.voiceover_id,
       success: data?.success
     }), {
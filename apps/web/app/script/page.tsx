@@ -408,6 +408,8 @@ function ScriptPageContent() {
           propertyFeatures,
           modelProvider,
           modelName,
+          // Regenerating over an existing script should produce a fresh draft
+          useCache: !editableScript,
         }),
       });
 
@@ -53,13 +53,6 @@ function VideoPlayer({
           throw new Error('Base64 data is empty');
         }
 
-        // Check if base64 is valid (basic check)
-        try {
-          atob(base64Data.substring(0, Math.min(100, base64Data.length)));
-        } catch (e) {
-          throw new Error(`Invalid base64 data: ${e}`);
-        }
-
         // Convert base64 to binary in chunks to avoid memory issues
         const binaryString = atob(base64Data);
         const bytes = new Uint8Array(binaryString.length);
@@ -123,30 +116,6 @@ function VideoPlayer({
     convertToBlob();
   }, [videoDataUrl]);
 
-  // Additional validation: check if blob URL is valid
-  React.useEffect(() => {
-    if (!blobUrl) return;
-    
-    // Try to fetch the blob to verify it's accessible
-    fetch(blobUrl)
-      .then(res => {
-        if (!res.ok) {
-          console.error('[VIDEO] Blob fetch failed:', res.status, res.statusText);
-          setError('Video blob is not accessible');
-        } else {
-        }
-        return res.blob();
-      })
-      .then(blob => {
-        if (blob.size === 0) {
-          setError('Video file appears to be empty');
-        }
-      })
-      .catch(e => {
-        console.error('[VIDEO] Error validating blob:', e);
-      });
-  }, [blobUrl]);
-
   const handleDownload = () => {
     if (blobUrl) {
       const a = document.createElement('a');
@@ -489,6 +458,28 @@ function VideoPageContent() {
 
       const data = JSON.parse(responseText);
       if (data.success && data.video_id) {
+        // Compilation runs in the background; poll until it finishes
+        const deadline = Date.now() + 600000; // 10 minutes
+        let status = data.status as string | undefined;
+        while (status !== 'completed') {
+          if (Date.now() > deadline) {
+            throw new Error('Video compilation is taking longer than expected. Please refresh in a few minutes.');
+          }
+          await new Promise((resolve) => setTimeout(resolve, 3000));
+          const statusRes = await fetch(`/api/video/compile/status/${data.video_id}`, {
+            headers: { Authorization: `Bearer ${session.access_token}` },
+            cache: 'no-store'
+          });
+          if (!statusRes.ok) {
+            throw new Error(`Failed to check compilation status (HTTP ${statusRes.status})`);
+          }
+          const statusData = await statusRes.json();
+          status = statusData.status;
+          if (status === 'failed') {
+            throw new Error(statusData.error_message || 'Video compilation failed');
+          }
+        }
+
         // Fetch the video data separately since it's too large to return in compile response
         const videoFetchRes = await fetch(`/api/video/project/${projectId}`, {
           headers: { Authorization: `Bearer ${session.access_token}` },
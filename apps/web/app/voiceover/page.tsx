@@ -80,8 +80,18 @@ function VoiceoverPageContent() {
           // If there are existing voiceovers, load the most recent one
           if (voiceovers.length > 0) {
             const latestVoiceover = voiceovers[0]; // Already sorted by created_at desc
-            if (latestVoiceover.audio_data_url) {
-              setAudioDataUrl(latestVoiceover.audio_data_url);
+            let audioSrc: string | null = latestVoiceover.audio_url || null;
+            if (!audioSrc) {
+              // Older voiceovers keep their audio inline; the list omits it, so fetch it on demand
+              const audioRes = await fetch(`/api/voiceover/${latestVoiceover.id}/audio`, {
+                headers: { 'Authorization': `Bearer ${session.access_token}` }
+              });
+              if (audioRes.ok) {
+                audioSrc = (await audioRes.json()).audio_url || null;
+              }
+            }
+            if (audioSrc) {
+              setAudioDataUrl(audioSrc);
               setHasGeneratedVoiceover(true);
               setAudioReady(false);
             }
@@ -128,9 +138,7 @@ function VoiceoverPageContent() {
       const textForTts = scriptForVoiceover?.trim() ?? '';
       const result = await generateVoiceoverSync(textForTts, 'voiceover.wav', { projectId: projectId || undefined, scriptId: scriptId || undefined, voice_id: 'default', model_id: 'system_tts' });
       
-      const url = URL.createObjectURL(result.blob);
-      setAudioUrl(url);
-      setAudioDataUrl(result.audioDataUrl);
+      setAudioUrl(result.audioUrl);
       setHasGeneratedVoiceover(true);
 
       // Update project current_step to 'voiceover' after successful generation
@@ -14,11 +14,13 @@ export async function getHealth(): Promise<HealthResponse> {
   return res.json();
 }
 
+const VOICEOVER_POLL_INTERVAL_MS = 1000;
+
 export async function generateVoiceoverSync(
   script: string,
   filename?: string,
   opts?: { projectId?: string; scriptId?: string; voice_id?: string; model_id?: string; format?: 'wav' | 'mp3' }
-): Promise<{ blob: Blob; audioDataUrl: string; voiceoverId: string }> {
+): Promise<{ audioUrl: string; voiceoverId: string }> {
   const controller = new AbortController();
   const timeoutId = setTimeout(() => controller.abort(), 60_000);
   try {
@@ -42,23 +44,29 @@ export async function generateVoiceoverSync(
       throw new Error(`Sync generation failed: ${resp.status} ${errText}`);
     }
     
-    const data = await resp.json();
-    if (!data.audio_blob || !data.audio_data_url) {
-      throw new Error('Invalid response format');
+    let data = await resp.json();
+    // Uncached audio is synthesized in the background: poll until it's stored
+    while (data.status === 'pending') {
+      await new Promise((resolve) => setTimeout(resolve, VOICEOVER_POLL_INTERVAL_MS));
+      const statusResp = await fetch(`/api/voiceover/${data.voiceover_id}`, {
+        cache: "no-store",
+        signal: controller.signal,
+      });
+      if (!statusResp.ok) {
+        const errText = await statusResp.text().catch(() => "");
+        throw new Error(`Voiceover status failed: ${statusResp.status} ${errText}`);
+      }
+      data = await statusResp.json();
     }
-    
-    // Convert base64 back to blob
-    const base64 = data.audio_blob;
-    const binaryString = atob(base64);
-    const bytes = new Uint8Array(binaryString.length);
-    for (let i = 0; i < binaryString.length; i++) {
-      bytes[i] = binaryString.charCodeAt(i);
+    if (data.status === 'failed') {
+      throw new Error('Voiceover synthesis failed');
+    }
+    if (!data.audio_url) {
+      throw new Error('Invalid response format');
     }
-    const blob = new Blob([bytes], { type: 'audio/wav' });
     
     return {
-      blob,
-      audioDataUrl: data.audio_data_url,
+      audioUrl: data.audio_url,
       voiceoverId: data.voiceover_id
     };
   } finally {
@@ -0,0 +1,79 @@
+"""
+One-shot migration: move legacy videos stored in `videos.video_data` onto disk.
+
+Each row with inline data is written to apps/videos/{id}.mp4, gets
+`video_url = /api/video/file/{id}` and has `video_data` cleared, so the API
+only ever serves videos from disk. Safe to re-run; migrated rows are skipped.
+
+Usage (from the repo root, with the API's Supabase env vars set):
+    python scripts/migrate_video_data_to_files.py
+"""
+
+import base64
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'apps', 'api'))
+
+from db.client import get_supabase  # noqa: E402
+
+VIDEOS_DIR = os.path.join(ROOT, 'apps', 'videos')
+
+
+def decode_video_data(video_data) -> bytes:
+    """Decode the legacy formats: data URL, bare base64, or Postgres bytea hex."""
+    if isinstance(video_data, bytes):
+        return video_data
+    if video_data.startswith('\\x'):
+        return bytes.fromhex(video_data[2:])
+    if video_data.startswith('data:'):
+        video_data = video_data.split(',', 1)[1]
+    return base64.b64decode(video_data)
+
+
+def main() -> None:
+    supabase = get_supabase()
+    os.makedirs(VIDEOS_DIR, exist_ok=True)
+
+    # Fetch ids first; the payloads are large, so pull them one row at a time
+    rows = (
+        supabase.table('videos')
+        .select('id')
+        .not_.is_('video_data', 'null')
+        .execute()
+    ).data or []
+    print(f"Found {len(rows)} videos with inline data")
+
+    for row in rows:
+        video_id = row['id']
+        result = (
+            supabase.table('videos')
+            .select('video_data')
+            .eq('id', video_id)
+            .limit(1)
+            .execute()
+        )
+        video_data = result.data[0].get('video_data') if result.data else None
+        if not video_data:
+            continue
+
+        try:
+            video_bytes = decode_video_data(video_data)
+        except Exception as e:
+            print(f"⚠️  Skipping {video_id}: could not decode video_data ({e})")
+            continue
+
+        video_filepath = os.path.join(VIDEOS_DIR, f"{video_id}.mp4")
+        with open(video_filepath, 'wb') as f:
+            f.write(video_bytes)
+
+        supabase.table('videos').update({
+            'video_url': f"/api/video/file/{video_id}",
+            'video_data': None
+        }).eq('id', video_id).execute()
+        print(f"✓ {video_id}: {len(video_bytes) / (1024 * 1024):.2f} MB -> {video_filepath}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+-- One voiceover per script, enforced by the database so the API can
+-- upsert on script_id instead of delete + insert.
+
+-- Keep only the newest voiceover for any script that has several
+DELETE FROM voiceovers v
+USING voiceovers newer
+WHERE v.script_id = newer.script_id
+  AND (v.created_at, v.id) < (newer.created_at, newer.id);
+
+ALTER TABLE voiceovers
+  ADD CONSTRAINT voiceovers_script_id_key UNIQUE (script_id);
@@ -0,0 +1,13 @@
+-- Cache of generated scripts keyed by a hash of the prompt, provider, model
+-- and sampling settings. Rows older than LLM_CACHE_TTL_DAYS are ignored by the
+-- API; prune them periodically with:
+--   DELETE FROM llm_cache WHERE created_at < now() - interval '7 days';
+
+CREATE TABLE IF NOT EXISTS llm_cache (
+  key TEXT PRIMARY KEY,
+  response TEXT NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Only the API (service role) reads and writes the cache
+ALTER TABLE llm_cache ENABLE ROW LEVEL SECURITY;
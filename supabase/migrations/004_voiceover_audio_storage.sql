@@ -0,0 +1,15 @@
+-- Voiceover audio lives in the private `voiceovers` Storage bucket; the row
+-- only records the object path. Older rows keep their inline audio_data_url.
+
+ALTER TABLE voiceovers
+  ADD COLUMN IF NOT EXISTS audio_storage_path TEXT;
+
+-- New rows no longer carry inline audio
+ALTER TABLE voiceovers
+  ALTER COLUMN audio_data_url DROP NOT NULL;
+
+-- Only the API (service role) reads and writes the bucket; browsers play
+-- audio through short-lived signed URLs
+INSERT INTO storage.buckets (id, name, public)
+VALUES ('voiceovers', 'voiceovers', false)
+ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,4 @@
+-- The API upserts voiceovers on script_id without sending an id, so an
+-- existing row keeps its primary key and new rows get one here.
+ALTER TABLE voiceovers
+  ALTER COLUMN id SET DEFAULT gen_random_uuid();
@@ -0,0 +1,14 @@
+-- Uncached voiceovers are synthesized in the background: rows start as
+-- 'pending' and end 'complete' or 'failed'. updated_at records when the
+-- current request was queued, so the API can fail rows whose synthesis was
+-- lost to a restart.
+
+ALTER TABLE voiceovers
+  ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+
+ALTER TABLE voiceovers
+  DROP CONSTRAINT IF EXISTS voiceovers_status_check;
+
+ALTER TABLE voiceovers
+  ADD CONSTRAINT voiceovers_status_check
+  CHECK (status IN ('pending', 'complete', 'failed'));